@@ -0,0 +1,164 @@
+"""
+Long-running SolZZT agent. Keeps the imports, the RPC connection pools, the keypair
+and a warm blockhash cache in memory and runs scan/sweep jobs sent over a Unix socket,
+so a job costs its own RPC round trips instead of a full cold start.
+
+    python solzzt.py --daemon
+    python solzzt_client.py scan --wallet <ADDRESS>
+
+Protocol: one JSON object per connection, newline terminated; the daemon answers
+with one JSON object and closes. See solzzt_client.py.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import httpx
+from solders.pubkey import Pubkey
+from solana.rpc.async_api import AsyncClient
+
+from sniffer import Sniffer
+from sweeper import Sweeper, BlockhashCache, BLOCKHASH_MAX_AGE_S
+from solzzt import load_keypair, run_cycle
+
+DEFAULT_SOCKET = os.environ.get("SOLZZT_SOCKET", os.path.join(tempfile.gettempdir(), f"solzzt-{os.getuid()}.sock"))
+MAX_REQUEST_BYTES = 64 * 1024
+
+class AgentDaemon:
+    def __init__(self, rpc_url: str, socket_path: str = DEFAULT_SOCKET):
+        self.rpc_url = rpc_url
+        self.socket_path = socket_path
+        self.blockhash_cache = BlockhashCache(max_age_s=BLOCKHASH_MAX_AGE_S)
+        self.started_at = time.monotonic()
+        self.jobs_run = 0
+        self._stopping = asyncio.Event()
+        self._job_lock = asyncio.Lock() # Jobs capture stdout, so they run one at a time
+
+    async def serve(self):
+        if _socket_in_use(self.socket_path):
+            raise RuntimeError(f"Another daemon is already listening on {self.socket_path}")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path) # Stale socket from a daemon that did not shut down cleanly
+
+        async with AsyncClient(self.rpc_url) as client, \
+                httpx.AsyncClient(limits=httpx.Limits(keepalive_expiry=300.0)) as http_client:
+            self.client = client
+            self.keypair = load_keypair()
+            self.sniffer = Sniffer(client, self.rpc_url, http_client=http_client)
+            self.sweeper = Sweeper(client, blockhash_cache=self.blockhash_cache)
+            await self._refresh_blockhash()
+
+            # Jobs can sign with the wallet keypair: owner only, from the moment the socket exists
+            old_umask = os.umask(0o077)
+            try:
+                server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_REQUEST_BYTES)
+            finally:
+                os.umask(old_umask)
+            os.chmod(self.socket_path, 0o600)
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, self._stopping.set)
+            keep_warm = asyncio.create_task(self._keep_warm())
+            _log(f"🟢 SolZZT daemon listening on {self.socket_path} (RPC: {self.rpc_url})")
+            try:
+                await self._stopping.wait()
+            finally:
+                keep_warm.cancel()
+                server.close()
+                await server.wait_closed()
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.socket_path)
+                _log("🛑 SolZZT daemon stopped.")
+
+    async def _refresh_blockhash(self):
+        try:
+            await self.blockhash_cache.refresh(self.client)
+        except Exception as e:
+            _log(f"⚠️ Could not refresh blockhash: {type(e).__name__} - {e}")
+
+    async def _keep_warm(self):
+        # Refreshing the blockhash before it ages out also keeps the RPC connection alive
+        while True:
+            await asyncio.sleep(BLOCKHASH_MAX_AGE_S / 2)
+            await self._refresh_blockhash()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                request = json.loads(await reader.readline())
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                response = await self.dispatch(request)
+            except (ValueError, asyncio.LimitOverrunError) as e: # JSONDecodeError is a ValueError
+                response = {"ok": False, "error": f"Bad request: {e}"}
+            except Exception as e: # Always answer: a silent close leaves the client waiting
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            try:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass # Client went away; the job already ran
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: dict) -> dict:
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "uptime_s": round(time.monotonic() - self.started_at, 1), "jobs_run": self.jobs_run}
+        if command == "shutdown":
+            self._stopping.set()
+            return {"ok": True}
+        if command not in ("scan", "sweep"):
+            return {"ok": False, "error": f"Unknown command: {command!r}"}
+
+        wallet = request.get("wallet") or (str(self.keypair.pubkey()) if self.keypair else None)
+        if not wallet:
+            return {"ok": False, "error": "No wallet given and no keypair loaded"}
+        if not isinstance(wallet, str):
+            raise ValueError("wallet must be a base58 string")
+        owner_pubkey = Pubkey.from_string(wallet) # ValueError -> bad request
+
+        async with self._job_lock:
+            output = io.StringIO()
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(output):
+                    print(f"🚀 SolAgent:002 daemon job '{command}' (Target: {wallet})")
+                    results = await run_cycle(self.client, self.rpc_url, owner_pubkey, self.keypair,
+                                              sniffer=self.sniffer, sweeper=self.sweeper, sweep=command == "sweep")
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}", "output": output.getvalue()}
+            finally:
+                self.jobs_run += 1
+        return {
+            "ok": True,
+            "command": command,
+            "wallet": wallet,
+            "zombie": [str(zombie) for zombie in results["zombie"]],
+            "transactions": results["transactions"],
+            "signatures": results["signatures"],
+            "elapsed_s": round(time.perf_counter() - start, 4),
+            "output": output.getvalue(),
+        }
+
+def _log(message: str):
+    # redirect_stdout swaps sys.stdout for the whole process while a job runs; the daemon's own
+    # messages (e.g. from _keep_warm) go to the real stdout so they never land in a client's output
+    print(message, file=sys.__stdout__, flush=True)
+
+def _socket_in_use(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+    return True
+
+def run_daemon(rpc_url: str, socket_path: str = DEFAULT_SOCKET):
+    asyncio.run(AgentDaemon(rpc_url, socket_path).serve())
@@ -0,0 +1,192 @@
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import asyncio
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+REPORT_VERSION = 2 # 2: wall/CPU count concurrent calls of a stage once; max_concurrent, stages_overlap
+OVERLAP_NOTE = ("Stages ran concurrently in different tasks: wall and CPU time of different stages overlap "
+                "and do not add up to the total, and allocation peaks are process-wide.")
+
+class StageStats:
+    __slots__ = ("name", "calls", "wall_s", "cpu_s", "bytes_in", "bytes_out", "alloc_peak_bytes",
+                 "max_concurrent", "_active", "_wall_since", "_cpu_since")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall_s = 0.0 # Time at least one call of the stage was open, so concurrent calls count once
+        self.cpu_s = 0.0 # Process CPU time over the same intervals
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.alloc_peak_bytes = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._wall_since = 0.0
+        self._cpu_since = 0.0
+
+    def enter(self):
+        if self._active == 0:
+            self._wall_since = time.perf_counter()
+            self._cpu_since = time.process_time()
+        self._active += 1
+        self.max_concurrent = max(self.max_concurrent, self._active)
+
+    def exit(self):
+        self._active -= 1
+        self.calls += 1
+        if self._active == 0:
+            self.wall_s += time.perf_counter() - self._wall_since
+            self.cpu_s += time.process_time() - self._cpu_since
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "alloc_peak_bytes": self.alloc_peak_bytes,
+            "max_concurrent": self.max_concurrent,
+        }
+
+class Profiler:
+    """
+    Records wall time, CPU time, bytes transferred and allocation peaks per agent stage.
+    A disabled Profiler is a no-op, so modules can always call it.
+    """
+    def __init__(self, enabled: bool = False, dump_prefix: str | None = None):
+        self.enabled = enabled
+        self.dump_prefix = dump_prefix
+        self.stages: dict[str, StageStats] = {}
+        self._open_frames = [] # [stage name, peak seen while it was open, task]
+        self._overlapped = False # A stage opened while another task had one open
+        self._cprofile = None
+        self._started_at = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._started_at = time.time()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        tracemalloc.start()
+        if self.dump_prefix:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        print("⏱️ Profiling enabled.")
+
+    def stop(self):
+        if not self.enabled or self._started_at is None:
+            return
+        if self._cprofile:
+            self._cprofile.disable()
+
+    def _stats(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        return stats
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name: str):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError: # No running loop
+            task = None
+        if any(open_task is not task for _, _, open_task in self._open_frames):
+            self._overlapped = True
+        # reset_peak() is process-wide: hand the peak so far to every open stage (nested or
+        # running concurrently in another task) before clearing it
+        alloc_start, peak = tracemalloc.get_traced_memory()
+        for open_frame in self._open_frames:
+            open_frame[1] = max(open_frame[1], peak)
+        frame = [name, 0, task]
+        self._open_frames.append(frame)
+        tracemalloc.reset_peak()
+        stats = self._stats(name)
+        stats.enter()
+        try:
+            yield
+        finally:
+            stats.exit()
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame[1])
+            self._open_frames.remove(frame)
+            for open_frame in self._open_frames:
+                open_frame[1] = max(open_frame[1], peak)
+            stats.alloc_peak_bytes = max(stats.alloc_peak_bytes, peak - alloc_start)
+
+    def add_bytes(self, name: str, received: int = 0, sent: int = 0):
+        if not self.enabled:
+            return
+        stats = self._stats(name)
+        stats.bytes_in += received
+        stats.bytes_out += sent
+
+    def report(self, **meta) -> dict:
+        """Builds the machine-readable run report."""
+        total = {
+            "wall_s": round(time.perf_counter() - self._wall_start, 6),
+            "cpu_s": round(time.process_time() - self._cpu_start, 6),
+            "bytes_in": sum(s.bytes_in for s in self.stages.values()),
+            "bytes_out": sum(s.bytes_out for s in self.stages.values()),
+            "alloc_peak_bytes": tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0,
+        }
+        report = {
+            "version": REPORT_VERSION,
+            "started_at": self._started_at,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "meta": meta,
+            "total": total,
+            "stages_overlap": self._overlapped,
+            "stages": [s.to_dict() for s in self.stages.values()],
+        }
+        if self._overlapped:
+            report["note"] = OVERLAP_NOTE
+        return report
+
+    def write_report(self, path: str, **meta):
+        if not self.enabled:
+            return
+        self.stop()
+        report = self.report(**meta)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"⏱️ Profile report written to {path}")
+
+        if self.dump_prefix:
+            self._write_dumps()
+        tracemalloc.stop()
+
+    def _write_dumps(self):
+        directory = os.path.dirname(self.dump_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._cprofile:
+            prof_path = f"{self.dump_prefix}.prof"
+            self._cprofile.dump_stats(prof_path)
+            print(f"⏱️ cProfile stats written to {prof_path} (view with: python -m pstats {prof_path})")
+            with open(f"{self.dump_prefix}.cprofile.txt", "w") as f:
+                pstats.Stats(self._cprofile, stream=f).sort_stats("cumulative").print_stats(40)
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            alloc_path = f"{self.dump_prefix}.tracemalloc.txt"
+            with open(alloc_path, "w") as f:
+                for stat in snapshot.statistics("lineno")[:40]:
+                    f.write(f"{stat}\n")
+            print(f"⏱️ Top allocations written to {alloc_path}")
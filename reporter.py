@@ -12,3 +12,6 @@ class Reporter:
                 print(f"  {i+1}. {zombie}")
         else:
             print("No zombie accounts found. Wallet is clean.")
+        blocked = results.get("blocked", [])
+        if blocked:
+            print(f"⛔ {len(blocked)} empty accounts cannot be closed yet (withheld transfer fees, confidential balance or another close authority).")
@@ -1,59 +1,130 @@
 from solders.pubkey import Pubkey
 from solana.rpc.async_api import AsyncClient
-from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
 from solana.rpc.types import Commitment, TokenAccountOpts
+import asyncio
 import httpx
-import json
+from contextlib import nullcontext
+from profiler import Profiler
+from rpc_schema import RpcError, SchemaError, TokenAccount, ValueStream, decode_result, unwrap_value
+
+TOKEN_PROGRAM_IDS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
 
 class Sniffer:
-    def __init__(self, client: AsyncClient, rpc_url: str):
+    def __init__(self, client: AsyncClient, rpc_url: str, profiler: Profiler | None = None, http_client: httpx.AsyncClient | None = None,
+                 verbose: bool = True):
         self.client = client
         self.rpc_url = rpc_url
+        self.profiler = profiler or Profiler()
+        self.http_client = http_client # Shared, pooled client (daemon and batch modes); otherwise one per call
+        self.verbose = verbose # Batch mode scans hundreds of wallets; it turns the per-account lines off
         print(f"✨ Sniffer initialized for RPC: {rpc_url}")
 
-    async def sniff_accounts(self, owner_pubkey: Pubkey) -> dict:
-        print(f"🕵️‍♀️ Sniffing accounts for owner: {owner_pubkey}")
+    async def sniff_accounts(self, owner_pubkey: Pubkey, on_zombies=None) -> dict:
+        """
+        Scans the owner's Token and Token-2022 accounts concurrently. Returns
+        {"zombie": [Pubkey], "blocked": [Pubkey], "active_count", "recoverable_lamports"}
+        plus an "error" message if a scan failed (the other fields are then partial).
+        "blocked" accounts are empty but cannot be closed yet (e.g. withheld transfer fees).
+        With `on_zombies`, the responses are streamed and that coroutine function is
+        awaited with each batch of (zombie, token program) pairs as soon as it is decoded.
+        """
+        if self.verbose:
+            print(f"🕵️‍♀️ Sniffing accounts for owner: {owner_pubkey}")
         
         zombie_accounts = []
-        
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getTokenAccountsByOwner",
-            "params": [
-                str(owner_pubkey),
-                {
-                    "programId": str(TOKEN_PROGRAM_ID)
-                },
-                {
-                    "encoding": "jsonParsed",
-                    "commitment": "confirmed"
-                }
-            ]
-        }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.rpc_url, json=payload)
-                response.raise_for_status() # Raise an exception for HTTP errors
-                raw_response_json = response.json()
-                
-                if "result" in raw_response_json and "value" in raw_response_json["result"]:
-                    for account_info_raw in raw_response_json["result"]["value"]:
-                        account_pubkey_str = account_info_raw["pubkey"]
-                        account_data_parsed = account_info_raw["account"]["data"]["parsed"]
-                        
-                        if 'info' in account_data_parsed and 'tokenAmount' in account_data_parsed['info']:
-                            token_amount = account_data_parsed['info']['tokenAmount']
-                            if token_amount['amount'] == '0':
-                                zombie_accounts.append(Pubkey.from_string(account_pubkey_str))
-                                print(f"  Found potential zombie: {account_pubkey_str}")
+        blocked_accounts = []
+        active_count = 0
+        recoverable_lamports = 0
+        rejected = 0
+        errors = []
+
+        def classify(items, program_id: Pubkey) -> list[tuple[Pubkey, Pubkey]]:
+            nonlocal active_count, recoverable_lamports, rejected
+            zombies = []
+            for item in items:
+                try:
+                    account = TokenAccount.decode(item)
+                except SchemaError as e:
+                    print(f"⚠️ Rejecting malformed account {item.get('pubkey') if isinstance(item, dict) else item!r:.60}: {e}")
+                    rejected += 1
+                    continue
+                if account is None:
+                    continue
+                if account.amount:
+                    active_count += 1
+                elif account.close_blocker:
+                    blocked_accounts.append(account.pubkey)
+                    if self.verbose:
+                        print(f"  Empty but not closable ({account.close_blocker}): {account.pubkey}")
+                else:
+                    zombies.append((account.pubkey, program_id))
+                    zombie_accounts.append(account.pubkey)
+                    recoverable_lamports += account.lamports
+                    if self.verbose:
+                        print(f"  Found potential zombie: {account.pubkey}")
+            return zombies
+
+        async def scan(client: httpx.AsyncClient, program_id: Pubkey):
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getTokenAccountsByOwner",
+                "params": [
+                    str(owner_pubkey),
+                    {
+                        "programId": str(program_id)
+                    },
+                    {
+                        "encoding": "jsonParsed",
+                        "commitment": "confirmed"
+                    }
+                ]
+            }
+            try:
+                if on_zombies is None:
+                    with self.profiler.stage("sniff.download"):
+                        response = await client.post(self.rpc_url, json=payload)
+                    self.profiler.add_bytes("sniff.download", received=len(response.content), sent=len(response.request.content))
+                    response.raise_for_status() # Raise an exception for HTTP errors
+                    with self.profiler.stage("sniff.decode"):
+                        token_accounts = unwrap_value(decode_result(response.content), "getTokenAccountsByOwner")
+                    with self.profiler.stage("sniff.classify"):
+                        classify(token_accounts, program_id)
+                else:
+                    with self.profiler.stage("sniff.stream"):
+                        async with client.stream("POST", self.rpc_url, json=payload) as response:
+                            if response.is_error:
+                                await response.aread() # The error handler below reports the body
+                            response.raise_for_status()
+                            stream = ValueStream("getTokenAccountsByOwner")
+                            async for chunk in response.aiter_bytes():
+                                self.profiler.add_bytes("sniff.stream", received=len(chunk))
+                                zombies = classify(stream.feed(chunk), program_id)
+                                if zombies:
+                                    await on_zombies(zombies) # Waits while the consumer is behind
+                            zombies = classify(stream.close(), program_id)
+                            if zombies:
+                                await on_zombies(zombies)
+                    self.profiler.add_bytes("sniff.stream", sent=len(response.request.content))
+            except RpcError as e:
+                errors.append(f"RPC error occurred: {e}")
+            except httpx.HTTPStatusError as e:
+                errors.append(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
+            except httpx.RequestError as e:
+                errors.append(f"An error occurred while requesting {e.request.url!r}: {e}")
+            except Exception as e:
+                errors.append(f"An unexpected error occurred during RPC parsing: {e}")
 
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
-        except httpx.RequestError as e:
-            print(f"An error occurred while requesting {e.request.url!r}: {e}")
-        except Exception as e:
-            print(f"An unexpected error occurred during RPC parsing: {e}")
+        async with nullcontext(self.http_client) if self.http_client else httpx.AsyncClient() as client:
+            # Both programs at once: the scan takes as long as the slower request, not the sum
+            await asyncio.gather(*(scan(client, program_id) for program_id in TOKEN_PROGRAM_IDS))
+        if rejected:
+            print(f"⚠️ Rejected {rejected} malformed accounts.")
         
-        return {"zombie": zombie_accounts}
+        results = {"zombie": zombie_accounts, "blocked": blocked_accounts, "active_count": active_count,
+                   "recoverable_lamports": recoverable_lamports}
+        if errors:
+            results["error"] = "; ".join(errors)
+            print(results["error"])
+        return results
@@ -0,0 +1,159 @@
+from array import array
+from typing import Iterable, Iterator
+from solders.pubkey import Pubkey
+
+# --- Account Categories ---
+ZOMBIE = 0
+DUST = 1
+ACTIVE = 2
+BLOCKED = 3 # Empty, but CloseAccount would fail (withheld Token-2022 fees, foreign close authority, ...)
+CATEGORY_NAMES = ("zombie", "dust", "active", "blocked")
+
+PUBKEY_LEN = 32
+
+class AccountStore:
+    """
+    Columnar result of a scan: one slot per account.
+    Pubkeys are packed 32-byte keys, amounts a uint64 array and categories a
+    uint8 array, so a scanned account costs ~42 bytes instead of a dict of strings.
+    Supports the legacy result-dict access (`results["zombie"]`, `.get(...)`)
+    through lazy views that only build base58 strings when serialized.
+    """
+    __slots__ = ("pubkeys", "amounts", "decimals", "categories", "rent_exemption_sol", "error", "_index_cache")
+
+    def __init__(self, rent_exemption_sol: float = 0.002039):
+        self.pubkeys = bytearray()
+        self.amounts = array("Q")
+        self.decimals = array("B")
+        self.categories = array("B")
+        self.rent_exemption_sol = rent_exemption_sol
+        self.error = None # Why the scan failed; the store then holds partial (usually no) results
+        self._index_cache = {}
+
+    def add_error(self, message: str):
+        """Records a failed scan; errors from concurrent scans are joined, not overwritten."""
+        self.error = message if self.error is None else f"{self.error}; {message}"
+
+    def append(self, pubkey: bytes, amount: int, decimals: int, category: int):
+        self.pubkeys += pubkey
+        self.amounts.append(amount)
+        self.decimals.append(decimals)
+        self.categories.append(category)
+        self._index_cache.clear()
+
+    def extend_columns(self, pubkeys: bytes, amounts: bytes, decimals: bytes, categories: bytes):
+        """Appends already packed columns (e.g. from a decode worker) without per-account work."""
+        self.pubkeys += pubkeys
+        self.amounts.frombytes(amounts)
+        self.decimals.frombytes(decimals)
+        self.categories.frombytes(categories)
+        self._index_cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def pubkey_bytes(self, slot: int) -> bytes:
+        start = slot * PUBKEY_LEN
+        return bytes(memoryview(self.pubkeys)[start:start + PUBKEY_LEN])
+
+    def slots(self, category: int) -> array:
+        """Slot indexes of one category (cached until the next append)."""
+        indexes = self._index_cache.get(category)
+        if indexes is None:
+            indexes = array("I", (i for i, c in enumerate(self.categories) if c == category))
+            self._index_cache[category] = indexes
+        return indexes
+
+    def count(self, category: int) -> int:
+        return len(self.slots(category))
+
+    @property
+    def total_recoverable_sol(self) -> float:
+        return self.count(ZOMBIE) * self.rent_exemption_sol
+
+    # --- Legacy result-dict access ---
+    def __getitem__(self, key: str):
+        if key == "zombie":
+            return AddressView(self, ZOMBIE)
+        if key == "blocked":
+            return AddressView(self, BLOCKED)
+        if key in ("dust", "active"):
+            return BalanceView(self, CATEGORY_NAMES.index(key))
+        if key == "total_recoverable_sol":
+            return self.total_recoverable_sol
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        return {
+            "zombie": list(self["zombie"]),
+            "dust": list(self["dust"]),
+            "active": list(self["active"]),
+            "blocked": list(self["blocked"]),
+            "total_recoverable_sol": self.total_recoverable_sol,
+        }
+
+class AddressView:
+    """Lazy sequence of base58 addresses of one category."""
+    __slots__ = ("store", "category")
+
+    def __init__(self, store: AccountStore, category: int):
+        self.store = store
+        self.category = category
+
+    def __len__(self) -> int:
+        return self.store.count(self.category)
+
+    def __iter__(self) -> Iterator[str]:
+        for slot in self.store.slots(self.category):
+            yield str(Pubkey.from_bytes(self.store.pubkey_bytes(slot)))
+
+    def __getitem__(self, index: int) -> str:
+        return str(Pubkey.from_bytes(self.store.pubkey_bytes(self.store.slots(self.category)[index])))
+
+    def pubkeys(self) -> Iterator[Pubkey]:
+        """Yields Pubkeys straight from the packed bytes, no base58 round trip."""
+        for slot in self.store.slots(self.category):
+            yield Pubkey.from_bytes(self.store.pubkey_bytes(slot))
+
+    def raw(self) -> Iterator[bytes]:
+        """Yields the packed 32-byte keys as is, for binary responses."""
+        for slot in self.store.slots(self.category):
+            yield self.store.pubkey_bytes(slot)
+
+class BalanceView(AddressView):
+    """Lazy sequence of {"address", "balance"} dicts of one category."""
+    __slots__ = ()
+
+    def _entry(self, slot: int) -> dict:
+        store = self.store
+        return {
+            "address": str(Pubkey.from_bytes(store.pubkey_bytes(slot))),
+            "balance": store.amounts[slot] / 10 ** store.decimals[slot],
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for slot in self.store.slots(self.category):
+            yield self._entry(slot)
+
+    def __getitem__(self, index: int) -> dict:
+        return self._entry(self.store.slots(self.category)[index])
+
+    def raw(self) -> Iterator[dict]:
+        """Same entries with the packed 32-byte key as the address."""
+        store = self.store
+        for slot in store.slots(self.category):
+            yield {"address": store.pubkey_bytes(slot), "balance": store.amounts[slot] / 10 ** store.decimals[slot]}
+
+def as_pubkeys(accounts: Iterable) -> Iterator[Pubkey]:
+    """Accepts an AddressView, Pubkeys or base58 strings and yields Pubkeys."""
+    if isinstance(accounts, AddressView):
+        yield from accounts.pubkeys()
+        return
+    for account in accounts:
+        yield account if isinstance(account, Pubkey) else Pubkey.from_string(account)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from app.accounts import ZOMBIE, ACTIVE, BLOCKED
+from app.rpc_schema import SchemaError, TokenAccount, loads
+
+# Responses smaller than this are decoded inline; bigger ones go to the process pool
+PARALLEL_DECODE_MIN_BYTES = 1024 * 1024
+MIN_CHUNK_BYTES = 256 * 1024
+
+RESULT_ARRAY_RE = re.compile(rb'"result"\s*:\s*\[')
+
+def find_result_array(raw: bytes) -> tuple[int, int] | None:
+    """Byte span of the items inside a JSON-RPC `"result": [...]`, without parsing it."""
+    match = RESULT_ARRAY_RE.search(raw)
+    if match is None:
+        return None
+    end = raw.rfind(b"]")
+    if end < match.end():
+        return None
+    return match.end(), end
+
+def split_items(raw: bytes, start: int, end: int, chunks: int) -> list[tuple[int, int]]:
+    """
+    Splits the items of a compact JSON array into roughly equal byte ranges.
+    Boundaries are found by searching for the separator between top-level
+    items (`},{"<first key>":`). A wrong guess only makes a chunk fail to parse,
+    and the caller then decodes the whole array in one piece.
+    """
+    first_key = re.match(rb'\s*\{\s*("[^"]+"\s*:)', raw[start:start + 64])
+    if chunks <= 1 or first_key is None:
+        return [(start, end)]
+    separator = b"},{" + first_key.group(1)
+
+    spans = []
+    chunk_start = start
+    step = (end - start) // chunks
+    for k in range(1, chunks):
+        target = max(start + k * step, chunk_start)
+        boundary = raw.find(separator, target, end)
+        if boundary == -1:
+            break
+        spans.append((chunk_start, boundary + 1))
+        chunk_start = boundary + 2 # Skip the comma
+    spans.append((chunk_start, end))
+    return spans
+
+def classify_items(items: list, owner: str) -> tuple[bytes, bytes, bytes, bytes, int]:
+    """
+    Filters jsonParsed token accounts (Token or Token-2022) by owner into packed AccountStore columns.
+    The last element is the number of malformed items that were rejected.
+    """
+    pubkeys = bytearray()
+    amounts = array("Q")
+    decimals = array("B")
+    categories = array("B")
+    rejected = 0
+    for item in items:
+        try:
+            account = TokenAccount.decode(item, owner)
+        except SchemaError as e:
+            if not rejected:
+                print(f"⚠️ Rejecting malformed account {item.get('pubkey') if isinstance(item, dict) else item!r:.60}: {e}")
+            rejected += 1
+            continue
+        if account is None:
+            continue
+        pubkeys += bytes(account.pubkey)
+        amounts.append(account.amount)
+        decimals.append(account.decimals)
+        # Classify as active for now, skip dust check to speed up debugging
+        if account.amount:
+            categories.append(ACTIVE)
+        else:
+            categories.append(BLOCKED if account.close_blocker else ZOMBIE)
+    return bytes(pubkeys), amounts.tobytes(), decimals.tobytes(), categories.tobytes(), rejected
+
+def _classify_shared_chunk(shm_name: str, start: int, end: int, owner: str) -> tuple[bytes, bytes, bytes, bytes, int]:
+    """Process pool worker: decodes one byte range of the shared response buffer."""
+    # spawn children share the parent's resource tracker, which unlinks the segment once
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with shm.buf[start:end] as view:
+            chunk = b"[" + view + b"]"
+    finally:
+        shm.close()
+    return classify_items(loads(chunk), owner)
+
+class ParallelDecoder:
+    """
+    Decodes and classifies large getProgramAccounts responses in worker processes.
+    The response is copied once into shared memory; workers read their byte
+    range from it and send back only the packed columns of matching accounts.
+    """
+    def __init__(self, max_workers: int | None = None, min_bytes: int = PARALLEL_DECODE_MIN_BYTES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_bytes = min_bytes
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def classify(self, raw: bytes, span: tuple[int, int], owner: str) -> list[tuple[bytes, bytes, bytes, bytes, int]]:
+        start, end = span
+        # Even with one worker the pool pays off: the decode no longer holds the event loop's GIL
+        if end - start < self.min_bytes:
+            return [classify_items(loads(raw[start - 1:end + 1]), owner)]
+
+        chunks = max(1, min(self.max_workers, (end - start) // MIN_CHUNK_BYTES))
+        spans = split_items(raw, start, end, chunks)
+        shm = shared_memory.SharedMemory(create=True, size=len(raw))
+        try:
+            shm.buf[:len(raw)] = raw
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            try:
+                return list(await asyncio.gather(*(
+                    loop.run_in_executor(pool, _classify_shared_chunk, shm.name, chunk_start, chunk_end, owner)
+                    for chunk_start, chunk_end in spans
+                )))
+            except json.JSONDecodeError:
+                print("⚠️ Parallel decode could not split the response cleanly, decoding it in one piece.")
+                return [await loop.run_in_executor(pool, _classify_shared_chunk, shm.name, start, end, owner)]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,52 @@
+import asyncio
+from app.database import Wallet
+from app.metrics import WATCH_SUBSCRIBERS
+
+# Per-subscriber backlog; a client this far behind only needs the latest status
+SUBSCRIBER_QUEUE_SIZE = 16
+
+def wallet_status(wallet: Wallet, status: str | None = None) -> dict:
+    """Status payload of a watched wallet, same shape as GET /watch/{wallet_address}."""
+    status = status or wallet.status
+    return {
+        "address": wallet.address,
+        "status": status,
+        "threshold_sol": wallet.threshold_sol,
+        "recoverable_sol": wallet.recoverable_sol,
+        "bundle_ready": status == "bundle_ready",
+        "bundle_tx": wallet.bundle_base64 if status == "bundle_ready" else None,
+    }
+
+class StatusHub:
+    """
+    In-memory fan-out of watch status changes. The Watcher publishes, each SSE
+    client holds a small queue for its wallet. Nothing here touches the database.
+    """
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def subscribe(self, address: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(address, set()).add(queue)
+        WATCH_SUBSCRIBERS.set(self.subscriber_count())
+        return queue
+
+    def unsubscribe(self, address: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(address)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[address]
+        WATCH_SUBSCRIBERS.set(self.subscriber_count())
+
+    def publish(self, address: str, event: dict):
+        for queue in self._subscribers.get(address, ()):
+            if queue.full():
+                queue.get_nowait() # Drop the oldest update rather than block the Watcher
+            queue.put_nowait(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+status_hub = StatusHub()
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import uuid
+from solders.pubkey import Pubkey
+from app.sweeper import Sweeper
+from app.metrics import QUEUE_LAG, SWEEP_JOBS, SWEEP_QUEUE_DEPTH
+
+# --- Defaults ---
+SWEEP_WORKERS = 4
+SWEEP_QUEUE_SIZE = 64 # Pending jobs beyond this are rejected with 429
+JOB_RESULT_TTL_SECONDS = 600 # Finished jobs stay pollable this long
+
+class QueueFull(Exception):
+    """The sweep queue is at capacity; the client should retry later."""
+
+class SweepJob:
+    __slots__ = ("id", "wallet", "zombies", "key", "status", "transactions", "stale_accounts", "error",
+                 "created_at", "started_at", "finished_at", "finished")
+
+    def __init__(self, wallet: str, zombies: list[str], key: tuple):
+        self.id = uuid.uuid4().hex
+        self.wallet = wallet
+        self.zombies = zombies
+        self.key = key
+        self.status = "queued" # queued -> running -> done | failed
+        self.transactions = []
+        self.stale_accounts = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = asyncio.Event()
+
+class SweepJobQueue:
+    """
+    Builds sweep transactions in a bounded pool of worker tasks, off the request path.
+    Identical in-flight jobs (same wallet and zombie set) share one job, and a full
+    queue raises QueueFull instead of letting bursts pile up on the event loop.
+    """
+    def __init__(self, sweeper: Sweeper, workers: int = SWEEP_WORKERS, max_pending: int = SWEEP_QUEUE_SIZE,
+                 result_ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+        self.sweeper = sweeper
+        self.workers = workers
+        self.result_ttl_seconds = result_ttl_seconds
+        self._queue: asyncio.Queue[SweepJob] = asyncio.Queue(maxsize=max_pending)
+        self._jobs: dict[str, SweepJob] = {}
+        self._in_flight: dict[tuple, SweepJob] = {}
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, wallet: str, zombies: list[str]) -> tuple[SweepJob, bool]:
+        """Returns (job, deduplicated). Raises QueueFull when the queue is at capacity."""
+        self._prune()
+        key = (wallet, tuple(sorted(set(zombies))))
+        existing = self._in_flight.get(key)
+        if existing is not None:
+            SWEEP_JOBS.inc("deduplicated")
+            return existing, True
+
+        job = SweepJob(wallet, zombies, key)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            SWEEP_JOBS.inc("rejected")
+            raise QueueFull(f"{self._queue.qsize()} sweep jobs pending") from None
+        self._jobs[job.id] = job
+        self._in_flight[key] = job
+        SWEEP_QUEUE_DEPTH.set(self._queue.qsize())
+        return job, False
+
+    def get(self, job_id: str) -> SweepJob | None:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: SweepJob, timeout: float) -> SweepJob:
+        """Waits up to `timeout` seconds for the job to finish (long polling)."""
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(job.finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            SWEEP_QUEUE_DEPTH.set(self._queue.qsize())
+            job.started_at = time.time()
+            job.status = "running"
+            QUEUE_LAG.observe(job.started_at - job.created_at, "sweep_jobs")
+            try:
+                await self._run(job)
+                job.status = "done"
+            except Exception as e:
+                print(f"ERROR: Sweep job {job.id} for {job.wallet} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._in_flight.pop(job.key, None)
+                job.finished.set()
+                SWEEP_JOBS.inc(job.status)
+                self._queue.task_done()
+
+    async def _run(self, job: SweepJob):
+        owner_pubkey = Pubkey.from_string(job.wallet)
+        # The client's zombie list may be stale: re-check it on chain before packing
+        verified = await self.sweeper.verify_zombies(job.zombies, owner_pubkey)
+        instructions = self.sweeper.create_close_instructions(verified, owner_pubkey)
+        # Pass owner_pubkey as payer placeholder for unsigned tx
+        job.transactions = await self.sweeper.build_transactions(instructions, owner_pubkey)
+        verified_addresses = {str(pubkey) for pubkey, _ in verified}
+        job.stale_accounts = [address for address in dict.fromkeys(job.zombies) if address not in verified_addresses]
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.metrics import observe_rpc, RPC_LANE_WAIT, RPC_LANE_IN_FLIGHT, RPC_LANE_QUEUED
+
+# --- Lanes ---
+INTERACTIVE = "interactive" # API requests and the sweep jobs they queue
+BACKGROUND = "background" # Watcher cycles
+LANES = (INTERACTIVE, BACKGROUND)
+
+# --- Defaults ---
+RPC_MAX_CONCURRENCY = 8 # RPC calls in flight across both lanes
+BACKGROUND_MAX_CONCURRENCY = 1 # Watcher calls run one at a time; the rest is reserved for users
+
+# Lane of the current task. Tasks inherit it, so marking the Watcher's cycle covers every call below it
+_current_lane: ContextVar[str] = ContextVar("rpc_lane", default=INTERACTIVE)
+
+@contextmanager
+def rpc_lane(lane: str):
+    """Runs the block's RPC calls (and those of tasks it creates) in `lane`."""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+class RpcLanes:
+    """
+    Admission control for RPC calls, so background load cannot crowd out users.
+    Interactive calls may take any free slot and are always woken first. Background
+    calls are capped at `background_limit` and do not start while an interactive call is waiting.
+    """
+    def __init__(self, max_concurrency: int = RPC_MAX_CONCURRENCY, background_limit: int = BACKGROUND_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.background_limit = min(background_limit, max_concurrency)
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._waiters: dict[str, deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+
+    def _has_slot(self, lane: str) -> bool:
+        if self._in_flight[INTERACTIVE] + self._in_flight[BACKGROUND] >= self.max_concurrency:
+            return False
+        if lane == INTERACTIVE:
+            return True
+        return self._in_flight[BACKGROUND] < self.background_limit and not self._waiters[INTERACTIVE]
+
+    async def acquire(self, lane: str) -> float:
+        """Waits for a slot in `lane` and returns the queueing delay in seconds."""
+        if lane not in self._in_flight:
+            raise ValueError(f"Unknown RPC lane: {lane}")
+        if not self._waiters[lane] and self._has_slot(lane): # FIFO within a lane
+            self._take(lane)
+            RPC_LANE_WAIT.observe(0.0, lane)
+            return 0.0
+
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        self._report(lane)
+        try:
+            await future # _wake() takes the slot on our behalf before resolving it
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(lane) # Woken and cancelled in the same tick: hand the slot on
+            elif future in self._waiters[lane]:
+                self._waiters[lane].remove(future)
+                self._wake() # A queued interactive call may have been holding background back
+            raise
+        waited = time.perf_counter() - start
+        RPC_LANE_WAIT.observe(waited, lane)
+        return waited
+
+    def release(self, lane: str):
+        self._in_flight[lane] -= 1
+        self._wake()
+
+    def in_flight(self, lane: str) -> int:
+        return self._in_flight[lane]
+
+    def queued(self, lane: str) -> int:
+        return len(self._waiters[lane])
+
+    def _take(self, lane: str):
+        self._in_flight[lane] += 1
+        self._report(lane)
+
+    def _wake(self):
+        for lane in LANES: # Interactive first
+            waiters = self._waiters[lane]
+            while waiters and self._has_slot(lane):
+                future = waiters.popleft()
+                if not future.done(): # Skip waiters cancelled while queued
+                    self._take(lane)
+                    future.set_result(None)
+            self._report(lane)
+
+    def _report(self, lane: str):
+        RPC_LANE_IN_FLIGHT.set(self._in_flight[lane], lane)
+        RPC_LANE_QUEUED.set(len(self._waiters[lane]), lane)
+
+rpc_lanes = RpcLanes()
+
+class rpc_call(observe_rpc):
+    """
+    observe_rpc for one RPC call that first waits for a slot in the current lane.
+    The wait is recorded per lane and kept out of the RPC latency histogram.
+        async with rpc_call("getProgramAccounts") as call:
+            response = await http_client.post(...)
+    """
+    __slots__ = ("lanes", "lane")
+
+    def __init__(self, method: str, lanes: RpcLanes | None = None):
+        super().__init__(method)
+        self.lanes = lanes
+
+    async def __aenter__(self):
+        self.lanes = self.lanes or rpc_lanes
+        self.lane = _current_lane.get()
+        await self.lanes.acquire(self.lane)
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return self.__exit__(exc_type, exc, tb)
+        finally:
+            self.lanes.release(self.lane)
@@ -0,0 +1,215 @@
+import time
+import threading
+from bisect import bisect_left
+
+# --- Metric Types ---
+# Deliberately tiny: a dict lookup and an add per observation, so the
+# instrumentation can stay on in the RPC and watcher hot paths.
+
+# Latency buckets (seconds) sized for Solana RPC: fast cached reads up to
+# slow unfiltered getProgramAccounts downloads.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, *label_values):
+        self._values[label_values] = value
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[label_values] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (bucket_counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- RPC Metrics ---
+RPC_LATENCY = REGISTRY.register(Histogram(
+    "solzzt_rpc_request_duration_seconds", "Latency of Solana RPC calls by method.", ("method",)))
+RPC_BYTES_RECEIVED = REGISTRY.register(Counter(
+    "solzzt_rpc_received_bytes_total", "Response bytes received from the RPC by method.", ("method",)))
+RPC_ERRORS = REGISTRY.register(Counter(
+    "solzzt_rpc_errors_total", "Failed RPC calls by method and error type.", ("method", "error")))
+RPC_RATE_LIMITED = REGISTRY.register(Counter(
+    "solzzt_rpc_rate_limited_total", "RPC calls rejected with HTTP 429 by method.", ("method",)))
+RPC_MALFORMED_ACCOUNTS = REGISTRY.register(Counter(
+    "solzzt_rpc_malformed_accounts_total", "Accounts in RPC responses rejected by schema validation.", ("method",)))
+RPC_LANE_WAIT = REGISTRY.register(Histogram(
+    "solzzt_rpc_lane_wait_seconds", "Time RPC calls queued for a slot, by lane (interactive/background).", ("lane",)))
+RPC_LANE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "solzzt_rpc_lane_in_flight", "RPC calls in flight by lane.", ("lane",)))
+RPC_LANE_QUEUED = REGISTRY.register(Gauge(
+    "solzzt_rpc_lane_queued", "RPC calls waiting for a slot by lane.", ("lane",)))
+
+# --- Pipeline Metrics ---
+SNIFF_DURATION = REGISTRY.register(Histogram(
+    "solzzt_sniff_duration_seconds", "Wall time of a full Sniffer.sniff_accounts run."))
+SWEEP_DURATION = REGISTRY.register(Histogram(
+    "solzzt_sweep_build_duration_seconds", "Wall time of Sweeper.build_transactions."))
+WATCHER_CYCLE_DURATION = REGISTRY.register(Histogram(
+    "solzzt_watcher_cycle_duration_seconds", "Wall time of one Watcher.scan_wallets cycle."))
+WATCHER_WALLETS_SCANNED = REGISTRY.register(Histogram(
+    "solzzt_watcher_wallets_scanned", "Wallets scanned per watcher cycle.", buckets=COUNT_BUCKETS))
+WATCHER_SKIPPED = REGISTRY.register(Counter(
+    "solzzt_watcher_skipped_total", "Watcher work skipped by change detection (scan/bundle).", ("stage",)))
+SWEEP_STALE_ACCOUNTS = REGISTRY.register(Counter(
+    "solzzt_sweep_stale_accounts_total", "Zombie candidates dropped by pre-flight verification by reason.", ("reason",)))
+SWEEP_JOBS = REGISTRY.register(Counter(
+    "solzzt_sweep_jobs_total", "Sweep jobs by outcome (done/failed/deduplicated/rejected).", ("result",)))
+SWEEP_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "solzzt_sweep_queue_depth", "Sweep jobs waiting for a worker."))
+WATCH_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "solzzt_watch_subscribers", "Open watch status event streams."))
+QUEUE_LAG = REGISTRY.register(Histogram(
+    "solzzt_queue_lag_seconds", "Delay between when work was due and when it started.", ("queue",)))
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    # solana-py wraps transport errors in SolanaRpcException; the cause keeps the HTTP status
+    cause = exc.__cause__
+    return cause is not None and cause is not exc and _is_rate_limited(cause)
+
+
+class observe_rpc:
+    """
+    Times one RPC call and records errors/429s on the way out.
+    Usage:
+        with observe_rpc("getProgramAccounts") as call:
+            response = await http_client.post(...)
+            call.received(len(response.content))
+    """
+    __slots__ = ("method", "_start")
+
+    def __init__(self, method: str):
+        self.method = method
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def received(self, num_bytes: int):
+        RPC_BYTES_RECEIVED.inc(self.method, amount=num_bytes)
+
+    def __exit__(self, exc_type, exc, tb):
+        RPC_LATENCY.observe(time.perf_counter() - self._start, self.method)
+        if exc is not None:
+            RPC_ERRORS.inc(self.method, exc_type.__name__)
+            if _is_rate_limited(exc):
+                RPC_RATE_LIMITED.inc(self.method)
+        return False
+
+
+class observe_duration:
+    """Records the wall time of a block into a histogram."""
+    __slots__ = ("histogram", "label_values", "_start")
+
+    def __init__(self, histogram: Histogram, *label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start, *self.label_values)
+        return False
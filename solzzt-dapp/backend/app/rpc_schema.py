@@ -0,0 +1,170 @@
+# Shared schema code is duplicated in the agent's rpc_schema.py at the repo root (the agent and the
+# backend ship separately). Keep SchemaError, RpcError, _field, _pubkey, decode_result, unwrap_value,
+# _close_blocker and TokenAccount identical in both; the raw account layout helpers are backend-only.
+import json
+import struct
+from solders.pubkey import Pubkey
+
+try:
+    import orjson
+    loads = orjson.loads # Several times faster than json.loads and shares repeated keys
+except ImportError: # orjson is optional; the stdlib parser returns the same objects
+    loads = json.loads
+
+class SchemaError(ValueError):
+    """An RPC payload (or one account in it) does not match the expected schema."""
+
+class RpcError(Exception):
+    """The RPC node answered with a JSON-RPC error object."""
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+
+def _field(obj, key: str, kind: type, where: str):
+    if not isinstance(obj, dict):
+        raise SchemaError(f"{where} is not an object")
+    value = obj.get(key)
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise SchemaError(f"{where}.{key} is missing or not a {kind.__name__}")
+    return value
+
+def _pubkey(value: str, where: str) -> Pubkey:
+    try:
+        return Pubkey.from_string(value)
+    except ValueError:
+        raise SchemaError(f"{where} is not a valid pubkey: {value!r}") from None
+
+def decode_result(raw: bytes):
+    """Decodes a JSON-RPC response body and returns its `result`; raises RpcError on an error reply."""
+    try:
+        response = loads(raw)
+    except json.JSONDecodeError as e:
+        raise SchemaError(f"response is not valid JSON: {e}") from None
+    if not isinstance(response, dict):
+        raise SchemaError("response is not an object")
+    if "error" in response:
+        error = response["error"]
+        if not isinstance(error, dict):
+            raise RpcError(-1, str(error))
+        raise RpcError(error.get("code", -1), error.get("message", ""))
+    if "result" not in response:
+        raise SchemaError("response has neither 'result' nor 'error'")
+    return response["result"]
+
+def unwrap_value(result, method: str):
+    """`getTokenAccountsByOwner` and friends wrap their payload in `{"context", "value"}`."""
+    return _field(result, "value", list, method)
+
+# --- Close Blockers ---
+# Empty accounts that CloseAccount still rejects: the rent is visible but not yet recoverable
+CONFIDENTIAL_EXTENSIONS = ("confidentialTransferAccount", "confidentialTransferFeeAmount")
+
+def _close_blocker(info: dict, owner: str) -> str | None:
+    """Why CloseAccount signed by `owner` would fail on this (jsonParsed) account, or None."""
+    close_authority = info.get("closeAuthority")
+    if close_authority is not None and close_authority != owner:
+        return "close_authority"
+    extensions = info.get("extensions") # Token-2022 only; the node has already decoded the TLV entries
+    if extensions is None:
+        return None
+    if not isinstance(extensions, list):
+        raise SchemaError("info.extensions is not a list")
+    for extension in extensions:
+        name = extension.get("extension") if isinstance(extension, dict) else None
+        if name == "transferFeeAmount":
+            if (extension.get("state") or {}).get("withheldAmount"):
+                return "withheld_fees" # Must be harvested to the mint first
+        elif name in CONFIDENTIAL_EXTENSIONS:
+            return "confidential_balance" # Encrypted balances cannot be checked for zero here
+    return None
+
+# --- Raw Account Layout ---
+TOKEN_ACCOUNT_LEN = 165
+CLOSE_AUTHORITY_OFFSET = 129 # COption<Pubkey>: u32 tag + 32 bytes
+TLV_OFFSET = TOKEN_ACCOUNT_LEN + 1 # Token-2022: one account-type byte, then (u16 type, u16 length, value) entries
+EXT_TRANSFER_FEE_AMOUNT = 2
+EXT_CONFIDENTIAL_TYPES = (5, 17) # ConfidentialTransferAccount, ConfidentialTransferFeeAmount
+
+def raw_close_blocker(data: bytes, owner: bytes) -> str | None:
+    """
+    Same check as the jsonParsed path for base64 account data. Only the TLV
+    headers are walked; extension values are skipped unless they can block the close.
+    """
+    if len(data) < TOKEN_ACCOUNT_LEN:
+        raise SchemaError(f"token account data is {len(data)} bytes, expected at least {TOKEN_ACCOUNT_LEN}")
+    if data[CLOSE_AUTHORITY_OFFSET] and data[CLOSE_AUTHORITY_OFFSET + 4:TOKEN_ACCOUNT_LEN] != owner:
+        return "close_authority"
+    pos, end = TLV_OFFSET, len(data)
+    while pos + 4 <= end:
+        ext_type, length = struct.unpack_from("<HH", data, pos)
+        pos += 4
+        if ext_type == 0:
+            break # Uninitialized: the rest is padding
+        if ext_type == EXT_TRANSFER_FEE_AMOUNT:
+            if int.from_bytes(data[pos:pos + 8], "little"):
+                return "withheld_fees"
+        elif ext_type in EXT_CONFIDENTIAL_TYPES:
+            return "confidential_balance"
+        pos += length
+    return None
+
+class TokenAccount:
+    """
+    A jsonParsed SPL token account (Token or Token-2022), as found in
+    `getProgramAccounts` and `getTokenAccountsByOwner` results.
+    """
+    __slots__ = ("pubkey", "owner", "mint", "amount", "decimals", "lamports", "close_blocker")
+
+    def __init__(self, pubkey: Pubkey, owner: str, mint: str, amount: int, decimals: int, lamports: int,
+                 close_blocker: str | None = None):
+        self.pubkey = pubkey
+        self.owner = owner
+        self.mint = mint
+        self.amount = amount
+        self.decimals = decimals
+        self.lamports = lamports # Rent held by the account, returned when it is closed
+        self.close_blocker = close_blocker # Set when CloseAccount would fail even at zero balance
+
+    @classmethod
+    def decode(cls, item, owner: str | None = None) -> "TokenAccount | None":
+        """
+        Validates one result item. Returns None for items that are well formed but
+        not of interest (mints and multisigs share the Token program, or another
+        owner's account when `owner` is given) and raises SchemaError for anything malformed.
+        """
+        if owner is not None:
+            # Most items of an unfiltered scan belong to someone else: drop them with plain lookups
+            try:
+                if item["account"]["data"]["parsed"]["info"]["owner"] != owner:
+                    return None
+            except (KeyError, TypeError):
+                pass # Not the usual shape; the checks below say why
+        account = _field(item, "account", dict, "item")
+        data = account.get("data")
+        if not isinstance(data, dict):
+            raise SchemaError("account.data is not jsonParsed (the node could not parse it)")
+        parsed = _field(data, "parsed", dict, "account.data")
+        if parsed.get("type") != "account":
+            return None
+        info = _field(parsed, "info", dict, "parsed")
+        account_owner = _field(info, "owner", str, "info")
+        if owner is not None and account_owner != owner:
+            return None
+
+        token_amount = _field(info, "tokenAmount", dict, "info")
+        amount = _field(token_amount, "amount", str, "tokenAmount")
+        if not amount.isdigit():
+            raise SchemaError(f"tokenAmount.amount is not an unsigned integer: {amount!r}")
+        decimals = _field(token_amount, "decimals", int, "tokenAmount")
+        if not 0 <= decimals <= 255:
+            raise SchemaError(f"tokenAmount.decimals out of range: {decimals}")
+        return cls(
+            _pubkey(_field(item, "pubkey", str, "item"), "item.pubkey"),
+            account_owner,
+            _field(info, "mint", str, "info"),
+            int(amount),
+            decimals,
+            _field(account, "lamports", int, "account"),
+            _close_blocker(info, account_owner),
+        )
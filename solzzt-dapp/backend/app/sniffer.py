@@ -1,3 +1,4 @@
+import asyncio
 import httpx
 import json
 import base64
@@ -6,15 +7,23 @@ from solana.rpc.async_api import AsyncClient # Use AsyncClient
 from solders.pubkey import Pubkey
 from solana.exceptions import SolanaRpcException
 from solana.rpc.types import TokenAccountOpts # For encoding='jsonParsed'
+from app.metrics import observe_duration, SNIFF_DURATION, RPC_MALFORMED_ACCOUNTS
+from app.lanes import rpc_call
+from app.accounts import AccountStore
+from app.decode import ParallelDecoder, find_result_array
+from app.rpc_schema import RpcError, decode_result
 
-# Define the SPL Token Program ID once
-TOKEN_PROGRAM_ID_STR = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5TT"
+# Define the SPL Token Program IDs once
+TOKEN_PROGRAM_ID_STR = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
 TOKEN_PROGRAM_ID_PUBKEY = Pubkey.from_string(TOKEN_PROGRAM_ID_STR)
+TOKEN_2022_PROGRAM_ID_STR = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+TOKEN_PROGRAM_IDS = (TOKEN_PROGRAM_ID_STR, TOKEN_2022_PROGRAM_ID_STR)
 
 class Sniffer:
-    def __init__(self, rpc_client: AsyncClient, rpc_url: str):
+    def __init__(self, rpc_client: AsyncClient, rpc_url: str, decoder: ParallelDecoder | None = None):
         self.client = rpc_client # Accept and use the AsyncClient
         self.rpc_url = rpc_url # Accept RPC URL string directly
+        self.decoder = decoder or ParallelDecoder() # Decodes huge responses off the event loop
         self.jupiter_price_api = "https://price.jup.ag/v4/price"
         self.rent_exemption_sol = 0.002039
 
@@ -35,92 +44,99 @@ class Sniffer:
             print(f"Network error fetching price for {mint_address}: {e}")
             return None
 
-    async def sniff_accounts(self, owner_pubkey: Pubkey):
+    async def sniff_accounts(self, owner_pubkey: Pubkey) -> AccountStore:
         """
         Scans a Solana wallet for token accounts and categorizes them.
-        Returns a dictionary with lists of 'zombie', 'dust', and 'active' accounts.
+        Returns an AccountStore; `results["zombie"]`, `["dust"]`, `["active"]` and
+        `["total_recoverable_sol"]` work as with the old result dictionary.
         """
-        accounts = {
-            "zombie": [],
-            "dust": [],
-            "active": [],
-            "total_recoverable_sol": 0.0
-        }
+        with observe_duration(SNIFF_DURATION):
+            return await self._sniff_accounts(owner_pubkey)
+
+    async def _sniff_accounts(self, owner_pubkey: Pubkey) -> AccountStore:
+        accounts = AccountStore(self.rent_exemption_sol)
         
         try:
-            all_token_accounts_on_chain = [] # To store all token account data
-            try:
-                # Set a generous timeout for this potentially very slow call
-                timeout = httpx.Timeout(30.0, connect=5.0)
-                async with httpx.AsyncClient(timeout=timeout) as http_client:
-                    payload = {
-                        "jsonrpc": "2.0",
-                        "id": 1,
-                        "method": "getProgramAccounts",
-                        "params": [
-                            TOKEN_PROGRAM_ID_STR,
-                            { "encoding": "jsonParsed" }
-                        ]
-                    }
-                    
-                    print(f"DEBUG (httpx, getProgramAccounts - ALL): Sending payload...")
-                    
-                    raw_httpx_response = await http_client.post(self.rpc_url, json=payload)
-                    raw_httpx_response.raise_for_status()
-                    raw_response_data = raw_httpx_response.json()
-                    
-                    print(f"DEBUG (httpx, getProgramAccounts - ALL): Successfully received RPC response.")
-
-                    if "error" in raw_response_data:
-                        print(f"Solana RPC returned an error in getProgramAccounts (ALL): {raw_response_data['error']}")
-                        return accounts
-
-                    if "result" in raw_response_data and isinstance(raw_response_data["result"], list):
-                        all_token_accounts_on_chain = raw_response_data["result"]
-                    else:
-                        print(f"No 'result' list in getProgramAccounts (ALL) response.")
-                        return accounts
+            # Set a generous timeout for this potentially very slow call
+            timeout = httpx.Timeout(30.0, connect=5.0)
+            async with httpx.AsyncClient(timeout=timeout) as http_client:
+                # Both token programs at once, so the scan takes as long as the slower one rather than the sum
+                await asyncio.gather(*(
+                    self._scan_program(http_client, program_id, owner_pubkey, accounts) for program_id in TOKEN_PROGRAM_IDS
+                ))
+        except Exception as e:
+            message = f"An unexpected error occurred during sniffing: {type(e).__name__} - {e}"
+            accounts.add_error(message)
+            print(message)
+        
+        return accounts
 
-            except httpx.TimeoutException:
-                print("ERROR: The RPC call to getProgramAccounts timed out after 30 seconds. The RPC node may be overloaded.")
-                raise # Re-raise the exception to be caught by the main handler
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP error during raw RPC call getProgramAccounts (ALL): {e.response.status_code} - {e.response.text}")
-                return accounts
-            except Exception as e:
-                print(f"Unexpected error during raw RPC call getProgramAccounts (ALL): {type(e).__name__} - {e}")
-                return accounts
+    async def _scan_program(self, http_client: httpx.AsyncClient, program_id: str, owner_pubkey: Pubkey, accounts: AccountStore):
+        """Adds the owner's accounts of one token program to `accounts`; failures are added to accounts.error."""
+        label = "Token-2022" if program_id == TOKEN_2022_PROGRAM_ID_STR else "Token"
+        try:
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getProgramAccounts",
+                "params": [
+                    program_id,
+                    { "encoding": "jsonParsed" }
+                ]
+            }
+            
+            print(f"DEBUG (httpx, getProgramAccounts - {label}): Sending payload...")
+            
+            async with rpc_call("getProgramAccounts") as call:
+                raw_httpx_response = await http_client.post(self.rpc_url, json=payload)
+                call.received(len(raw_httpx_response.content))
+                raw_httpx_response.raise_for_status()
+            raw_content = raw_httpx_response.content
             
-            if not all_token_accounts_on_chain:
-                print(f"No SPL Token accounts found on chain via getProgramAccounts (ALL).")
-                return accounts
+            print(f"DEBUG (httpx, getProgramAccounts - {label}): Successfully received RPC response.")
 
-            # Now, filter client-side for accounts owned by our owner_pubkey
-            print(f"DEBUG: Filtering {len(all_token_accounts_on_chain)} SPL Token accounts client-side for owner {owner_pubkey}...")
-            for account_item in all_token_accounts_on_chain:
+            # Locate the result array without decoding it; only small error bodies are parsed here
+            result_span = find_result_array(raw_content)
+            if result_span is None:
                 try:
-                    account_data = account_item.get("account", {}).get("data", {}).get("parsed", {}).get("info", {})
-                    account_owner_str = account_data.get("owner")
-                    
-                    if account_owner_str == str(owner_pubkey):
-                        account_address = Pubkey.from_string(account_item["pubkey"])
-                        mint = Pubkey.from_string(account_data["mint"])
-                        balance_ui = float(account_data["tokenAmount"]["uiAmount"])
-                        
-                        if balance_ui == 0:
-                            accounts["zombie"].append(str(account_address))
-                            accounts["total_recoverable_sol"] += self.rent_exemption_sol
-                        else:
-                            # Classify as active for now, skip dust check to speed up debugging
-                            accounts["active"].append({ "address": str(account_address), "balance": balance_ui })
+                    decode_result(raw_content)
+                    message = f"No 'result' list in getProgramAccounts ({label}) response."
+                except RpcError as e:
+                    message = f"Solana RPC returned an error in getProgramAccounts ({label}): {e}"
+                accounts.add_error(message)
+                print(message)
+                return
 
-                except (KeyError, TypeError) as e:
-                    # These errors are expected for accounts with different structures, so we can ignore them
-                    pass 
+        except httpx.TimeoutException:
+            message = f"ERROR: The RPC call to getProgramAccounts ({label}) timed out after 30 seconds. The RPC node may be overloaded."
+            accounts.add_error(message)
+            print(message)
+            return
+        except httpx.HTTPStatusError as e:
+            message = f"HTTP error during raw RPC call getProgramAccounts ({label}): {e.response.status_code} - {e.response.text}"
+            accounts.add_error(message)
+            print(message)
+            return
         except Exception as e:
-            print(f"An unexpected error occurred during sniffing: {type(e).__name__} - {e}")
+            message = f"Unexpected error during raw RPC call getProgramAccounts ({label}): {type(e).__name__} - {e}"
+            accounts.add_error(message)
+            print(message)
+            return
         
-        return accounts
+        if result_span[0] == result_span[1]:
+            print(f"No SPL Token accounts found on chain via getProgramAccounts ({label}).")
+            return
+
+        # Now, filter client-side for accounts owned by our owner_pubkey.
+        # Big responses are decoded and classified in worker processes so the API stays responsive.
+        print(f"DEBUG: Filtering {len(raw_content)} bytes of {label} token accounts client-side for owner {owner_pubkey}...")
+        rejected = 0
+        for *columns, chunk_rejected in await self.decoder.classify(raw_content, result_span, str(owner_pubkey)):
+            accounts.extend_columns(*columns)
+            rejected += chunk_rejected
+        if rejected:
+            RPC_MALFORMED_ACCOUNTS.inc("getProgramAccounts", amount=rejected)
+            print(f"⚠️ Rejected {rejected} malformed accounts in the getProgramAccounts ({label}) response.")
 
 async def main():
     rpc_client_for_test = AsyncClient("https://devnet.helius-rpc.com/?api-key=929876d8-c714-47d1-a1d4-6541ac589e56")
@@ -131,9 +147,9 @@ async def main():
     print(f"Sniffing accounts for {owner_pubkey}...")
     results = await sniffer.sniff_accounts(owner_pubkey)
     
-    print(f"Zombie Accounts ({len(results['zombie'])}): {results['zombie']}")
-    print(f"Dust Accounts ({len(results['dust'])}): {results['dust']}")
-    print(f"Active Accounts ({len(results['active'])}): {results['active']}")
+    print(f"Zombie Accounts ({len(results['zombie'])}): {list(results['zombie'])}")
+    print(f"Dust Accounts ({len(results['dust'])}): {list(results['dust'])}")
+    print(f"Active Accounts ({len(results['active'])}): {list(results['active'])}")
     print(f"Total potential SOL to recover: {results['total_recoverable_sol']:.6f} SOL")
     await rpc_client_for_test.close()
 
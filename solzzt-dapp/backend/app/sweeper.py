@@ -5,28 +5,97 @@ from solders.message import Message
 from solders.compute_budget import set_compute_unit_price, set_compute_unit_limit
 from solana.rpc.async_api import AsyncClient
 from spl.token.instructions import close_account, CloseAccountParams
-from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
 from solders.keypair import Keypair 
+import asyncio
 import base64
+from app.metrics import observe_duration, SWEEP_DURATION, SWEEP_STALE_ACCOUNTS
+from app.lanes import rpc_call
+from app.accounts import AddressView, as_pubkeys
+from app.rpc_schema import SchemaError, raw_close_blocker
+
+# getMultipleAccounts takes at most 100 keys per call
+VERIFY_CHUNK_SIZE = 100
+VERIFY_CONCURRENCY = 4
+TOKEN_PROGRAMS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+
+def _close_targets(zombies) -> list[tuple[Pubkey, Pubkey]]:
+    """(account, token program) pairs; plain addresses are taken to be Token program accounts."""
+    if isinstance(zombies, AddressView):
+        return [(account, TOKEN_PROGRAM_ID) for account in zombies.pubkeys()]
+    return [zombie if isinstance(zombie, tuple) else (next(as_pubkeys((zombie,))), TOKEN_PROGRAM_ID) for zombie in zombies]
 
 class Sweeper:
     def __init__(self, rpc_client: AsyncClient):
         self.client = rpc_client
 
-    def create_close_instructions(self, zombie_addresses: list[str], owner: Pubkey) -> list[Instruction]:
+    def create_close_instructions(self, zombie_addresses, owner: Pubkey) -> list[Instruction]:
+        """
+        Accepts base58 strings, Pubkeys or an AccountStore zombie view (read without
+        re-parsing), closed through the Token program, or the (account, token program)
+        pairs returned by verify_zombies.
+        """
         instructions = []
-        for addr in zombie_addresses:
-            # Create standard SPL Token Close instruction
+        for account, program_id in _close_targets(zombie_addresses):
+            # CloseAccount has the same layout in Token and Token-2022; the program decides who executes it
             ix = close_account(CloseAccountParams(
-                account=Pubkey.from_string(addr),
+                account=account,
                 dest=owner,
                 owner=owner,
-                program_id=TOKEN_PROGRAM_ID,
+                program_id=program_id,
                 signers=[owner]
             ))
             instructions.append(ix)
         return instructions
 
+    async def verify_zombies(self, zombie_addresses, owner: Pubkey) -> list[tuple[Pubkey, Pubkey]]:
+        """
+        Pre-flight check before packing: re-reads the candidates with chunked
+        getMultipleAccounts calls and keeps only those that still exist, are token
+        accounts of `owner`, hold zero tokens and have nothing blocking the close.
+        Zombie lists can be minutes old or come from the client, and one stale account
+        fails its whole transaction. Returns (account, token program) pairs, so
+        Token-2022 accounts are closed through their own program.
+        """
+        candidates = list(dict.fromkeys(as_pubkeys(zombie_addresses))) # A duplicate close would fail too
+        if not candidates:
+            return []
+        semaphore = asyncio.Semaphore(VERIFY_CONCURRENCY)
+
+        owner_bytes = bytes(owner)
+
+        async def verify_chunk(chunk: list[Pubkey]) -> list[tuple[Pubkey, Pubkey]]:
+            async with semaphore:
+                async with rpc_call("getMultipleAccounts"):
+                    # Full data: the close authority and the Token-2022 extensions sit past the first 72 bytes
+                    resp = await self.client.get_multiple_accounts(chunk, encoding="base64")
+            verified = []
+            for pubkey, account in zip(chunk, resp.value):
+                if account is None:
+                    reason = "closed"
+                elif account.owner not in TOKEN_PROGRAMS:
+                    reason = "not_token_account"
+                elif len(account.data) < 72 or account.data[32:64] != owner_bytes:
+                    reason = "owner_changed"
+                elif int.from_bytes(account.data[64:72], "little") != 0:
+                    reason = "refilled"
+                else:
+                    try:
+                        reason = raw_close_blocker(account.data, owner_bytes)
+                    except SchemaError:
+                        reason = "not_token_account"
+                    if reason is None:
+                        verified.append((pubkey, account.owner))
+                        continue
+                SWEEP_STALE_ACCOUNTS.inc(reason)
+            return verified
+
+        chunks = [candidates[i:i + VERIFY_CHUNK_SIZE] for i in range(0, len(candidates), VERIFY_CHUNK_SIZE)]
+        verified = [target for chunk in await asyncio.gather(*(verify_chunk(c) for c in chunks)) for target in chunk]
+        if len(verified) < len(candidates):
+            print(f"🧽 Dropped {len(candidates) - len(verified)} stale accounts (closed, refilled, no longer owned or blocked) before sweeping.")
+        return verified
+
     async def get_optimal_priority_fee(self) -> int:
         """
         Fetches recent prioritization fees from the RPC and calculates an optimal fee.
@@ -36,7 +105,8 @@ class Sweeper:
             # Fetch recent fees (looking back 150 slots)
             # Note: get_recent_prioritization_fees takes a list of writable accounts, 
             # passing empty list checks global average which is fine for this use case.
-            resp = await self.client.get_recent_prioritization_fees([])
+            async with rpc_call("getRecentPrioritizationFees"):
+                resp = await self.client.get_recent_prioritization_fees([])
             fees = [x.prioritization_fee for x in resp.value]
             
             if not fees:
@@ -59,8 +129,13 @@ class Sweeper:
         if not instructions:
             return []
 
+        with observe_duration(SWEEP_DURATION):
+            return await self._build_transactions(instructions, payer_pubkey)
+
+    async def _build_transactions(self, instructions: list[Instruction], payer_pubkey: Pubkey) -> list[str]:
         # 1. Fetch Real Blockhash
-        latest_blockhash_resp = await self.client.get_latest_blockhash()
+        async with rpc_call("getLatestBlockhash"):
+            latest_blockhash_resp = await self.client.get_latest_blockhash()
         recent_blockhash = latest_blockhash_resp.value.blockhash
 
         # 2. Calculate Priority Fee
@@ -85,14 +160,11 @@ class Sweeper:
             # Add the close instructions
             batch_ixs.extend(instructions[i:i + batch_size])
             
-            # Create Message
-            msg = Message(batch_ixs, payer_pubkey)
-            
-            # Create Transaction object (Unsigned)
-            tx = Transaction([], msg, recent_blockhash)
+            # Create Message (the payer is the fee payer)
+            msg = Message.new_with_blockhash(batch_ixs, payer_pubkey, recent_blockhash)
             
-            # Set the fee payer
-            tx.fee_payer = payer_pubkey
+            # Create Transaction object (Unsigned, signature slots left empty for the wallet)
+            tx = Transaction.new_unsigned(msg)
             
             # Serialize
             tx_bytes = bytes(tx)
@@ -1,55 +1,136 @@
 import asyncio
+import hashlib
 import time
 from sqlmodel import Session, select
 from solders.pubkey import Pubkey
 from app.database import Wallet, engine
 from app.sniffer import Sniffer
 from app.sweeper import Sweeper
+from app.metrics import observe_duration, WATCHER_CYCLE_DURATION, WATCHER_WALLETS_SCANNED, WATCHER_SKIPPED, QUEUE_LAG
+from app.events import StatusHub, status_hub, wallet_status
+from app.lanes import BACKGROUND, rpc_call, rpc_lane
+
+# --- Change Detection ---
+# Third-party deposits into a token account do not touch the owner's address, so even a
+# quiet wallet gets a full scan this often
+FULL_RESCAN_SECONDS = 900
+
+def zombie_set_hash(zombies) -> str:
+    """Order-independent fingerprint of a zombie address set."""
+    digest = hashlib.blake2b(digest_size=16)
+    for address in sorted(zombies):
+        digest.update(address.encode())
+    return digest.hexdigest()
+
+class WalletActivity:
+    """What the Watcher saw at a wallet's last successful full scan."""
+    __slots__ = ("signature", "zombie_hash", "scanned_at")
+
+    def __init__(self, signature, zombie_hash: str, scanned_at: float):
+        self.signature = signature # Newest signature of the owner address, None if it has no history
+        self.zombie_hash = zombie_hash
+        self.scanned_at = scanned_at
 
 class Watcher:
-    def __init__(self, sniffer: Sniffer, sweeper: Sweeper):
+    def __init__(self, sniffer: Sniffer, sweeper: Sweeper, hub: StatusHub | None = None):
         self.sniffer = sniffer
         self.sweeper = sweeper
+        self.hub = hub or status_hub # Subscribers get every status change pushed
         self.is_running = False
+        self.interval_seconds = 60
+        # Per-wallet change detection state. Kept in memory: after a restart every wallet gets one full scan
+        self._activity: dict[str, WalletActivity] = {}
 
     async def start_loop(self, interval_seconds: int = 60):
         """Starts the background monitoring loop."""
         self.is_running = True
+        self.interval_seconds = interval_seconds
         print(f"👁️ Auto-Maintenance Watcher started. Scanning every {interval_seconds}s...")
         while self.is_running:
             await self.scan_wallets()
             await asyncio.sleep(interval_seconds)
 
+    def forget(self, address: str):
+        """Drops a wallet's change detection state so the next cycle scans it (and builds its bundle) in full."""
+        self._activity.pop(address, None)
+
+    async def _has_moved(self, owner_pubkey: Pubkey, activity: WalletActivity | None) -> tuple[bool, object]:
+        """
+        Returns (moved, newest signature) for the owner address. A single
+        getSignaturesForAddress call bounded by `until`, so a quiet wallet costs an empty list.
+        """
+        until = activity.signature if activity else None
+        try:
+            async with rpc_call("getSignaturesForAddress"):
+                response = await self.sniffer.client.get_signatures_for_address(owner_pubkey, until=until, limit=1)
+        except Exception as e:
+            print(f"⚠️ [Watcher] Could not check activity of {owner_pubkey}, scanning anyway: {e}")
+            return True, until
+        newest = response.value[0].signature if response.value else until
+        return activity is None or newest != until, newest
+
     async def scan_wallets(self):
         """Iterates through all watched wallets and checks for threshold breaches."""
+        # Background lane: user requests get RPC slots first while a cycle runs
+        with rpc_lane(BACKGROUND), observe_duration(WATCHER_CYCLE_DURATION):
+            scanned = await self._scan_wallets()
+        WATCHER_WALLETS_SCANNED.observe(scanned)
+
+    async def _scan_wallets(self) -> int:
+        scanned = 0
         with Session(engine) as session:
             statement = select(Wallet)
             wallets = session.exec(statement).all()
             
             for wallet in wallets:
+                last_status = None
                 try:
                     # Skip if already ready (waiting for user action)
                     if wallet.status == "bundle_ready":
                         continue
 
-                    print(f"🔍 [Watcher] Scanning {wallet.address}...")
+                    now = time.time()
+                    if wallet.last_scanned_at:
+                        # How far behind schedule this wallet's rescan is running
+                        QUEUE_LAG.observe(max(0.0, now - wallet.last_scanned_at - self.interval_seconds), "watcher")
                     owner_pubkey = Pubkey.from_string(wallet.address)
+
+                    # 0. Skip the full scan if the owner has not signed anything since the last one
+                    activity = self._activity.get(wallet.address)
+                    moved, newest_signature = await self._has_moved(owner_pubkey, activity)
+                    if not moved and now - activity.scanned_at < FULL_RESCAN_SECONDS:
+                        WATCHER_SKIPPED.inc("scan")
+                        wallet.last_scanned_at = now
+                        session.add(wallet)
+                        session.commit()
+                        continue
+
+                    print(f"🔍 [Watcher] Scanning {wallet.address}...")
+                    scanned += 1
+                    last_status = wallet_status(wallet)
+                    self.hub.publish(wallet.address, wallet_status(wallet, "scanning"))
                     
                     # 1. Sniff
                     results = await self.sniffer.sniff_accounts(owner_pubkey)
                     recoverable = results.get("total_recoverable_sol", 0.0)
                     zombies = results.get("zombie", [])
+                    zombie_hash = zombie_set_hash(zombies)
 
                     # Update stats
-                    wallet.last_scanned_at = time.time()
+                    wallet.last_scanned_at = now
                     wallet.recoverable_sol = recoverable
                     
                     # 2. Check Threshold
-                    if recoverable >= wallet.threshold_sol and len(zombies) > 0:
+                    if recoverable >= wallet.threshold_sol and len(zombies) > 0 and activity and activity.zombie_hash == zombie_hash:
+                        # Same zombies as the last build attempt: its outcome stands, no new fee and blockhash calls
+                        print(f"♻️ [Watcher] Zombie set of {wallet.address} unchanged, keeping the last bundle decision.")
+                        WATCHER_SKIPPED.inc("bundle")
+                    elif recoverable >= wallet.threshold_sol and len(zombies) > 0:
                         print(f"🚨 [Watcher] Threshold triggered for {wallet.address}! ({recoverable} >= {wallet.threshold_sol})")
                         
-                        # 3. Auto-Sweep (Prepare Bundle)
-                        ixs = self.sweeper.create_close_instructions(zombies, owner_pubkey)
+                        # 3. Auto-Sweep (Prepare Bundle), skipping accounts that changed since the scan
+                        verified = await self.sweeper.verify_zombies(zombies, owner_pubkey)
+                        ixs = self.sweeper.create_close_instructions(verified, owner_pubkey)
                         # Note: We need a payer for the transaction. In this autonomous mode, 
                         # we assume the user will sign, so we use their pubkey as payer placeholder.
                         txs = await self.sweeper.build_transactions(ixs, owner_pubkey)
@@ -62,8 +143,17 @@ class Watcher:
                         wallet.status = "idle"
                         wallet.bundle_base64 = None
                     
+                    event = wallet_status(wallet) # Built before commit() expires the loaded attributes
                     session.add(wallet)
                     session.commit()
+                    self.hub.publish(wallet.address, event)
+                    if results.error:
+                        self._activity.pop(wallet.address, None) # Never skip on the strength of a failed scan
+                    else:
+                        self._activity[wallet.address] = WalletActivity(newest_signature, zombie_hash, now)
                     
                 except Exception as e:
                     print(f"❌ [Watcher] Error scanning {wallet.address}: {e}")
+                    if last_status:
+                        self.hub.publish(last_status["address"], last_status) # Back to the last stored status
+        return scanned
@@ -0,0 +1,398 @@
+"""
+Synthetic local Solana JSON-RPC server for offline benchmarks and tests.
+
+Generates deterministic SPL Token program state (accounts, owners, zombies) and
+answers the subset of RPC methods the agent uses, with injectable latency and
+HTTP 429 rate limiting. The server runs in its own process so that its JSON
+rendering does not compete with the code being measured.
+
+    with MockRpcServer(ChainConfig(num_accounts=10_000, zombie_ratio=0.3)) as rpc:
+        sniffer = Sniffer(AsyncClient(rpc.url), rpc.url)
+"""
+import base64
+import hashlib
+import json
+import multiprocessing
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+TOKEN_PROGRAM_ID_STR = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM_ID_STR = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+TOKEN_ACCOUNT_LEN = 165
+TOKEN_ACCOUNT_RENT_LAMPORTS = 2039280
+# Base layout + account type byte + ImmutableOwner (4) and TransferFeeAmount (12) TLV entries
+TOKEN_2022_ACCOUNT_LEN = 182
+TOKEN_2022_ACCOUNT_RENT_LAMPORTS = (TOKEN_2022_ACCOUNT_LEN + 128) * 6960
+U64_MAX = 18446744073709551615
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def b58decode(value: str) -> bytes:
+    number = 0
+    for char in value:
+        number = number * 58 + B58_ALPHABET.index(char)
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading_zeros + decoded
+
+@dataclass
+class ChainConfig:
+    num_accounts: int = 1000
+    num_owners: int = 100
+    zombie_ratio: float = 0.3
+    owner_distribution: str = "zipf" # "zipf" (owner 0 is the whale) or "uniform"
+    seed: int = 7
+    latency_ms: float = 0.0 # Added to every request
+    jitter_ms: float = 0.0 # Uniform extra latency on top of latency_ms
+    rate_limit_ratio: float = 0.0 # Fraction of requests answered with HTTP 429
+    max_concurrency: int = 0 # Requests served at once, the rest wait (provider concurrency cap); 0 = unlimited
+    priority_fee: int = 5000
+    token_2022_ratio: float = 0.0 # Fraction of accounts under Token-2022; a quarter of those have withheld fees
+
+class SyntheticChain:
+    """Deterministic token program state built from a ChainConfig."""
+    def __init__(self, config: ChainConfig):
+        self.config = config
+        rng = random.Random(config.seed)
+
+        self.owners = [str(Pubkey(rng.randbytes(32))) for _ in range(config.num_owners)]
+        self.mints = [str(Pubkey(rng.randbytes(32))) for _ in range(max(1, config.num_accounts // 50))]
+
+        if config.owner_distribution == "uniform":
+            weights = None
+        else:
+            weights = [1.0 / (rank + 1) for rank in range(config.num_owners)]
+        owner_indexes = rng.choices(range(config.num_owners), weights=weights, k=config.num_accounts)
+
+        # Parallel columns keep 1M accounts affordable in memory
+        self.addresses = []
+        self.account_owner = owner_indexes
+        self.account_mint = []
+        self.amounts = []
+        self.decimals = []
+        for _ in range(config.num_accounts):
+            self.addresses.append(str(Pubkey(rng.randbytes(32))))
+            self.account_mint.append(rng.randrange(len(self.mints)))
+            self.amounts.append(0 if rng.random() < config.zombie_ratio else rng.randrange(1, 10**12))
+            self.decimals.append(rng.choice((0, 6, 9)))
+
+        # Own generator, so the Token-only state above stays identical for a given seed
+        rng_2022 = random.Random(config.seed + 1)
+        self.is_2022 = bytearray(config.num_accounts)
+        self.withheld = {} # Token-2022 account index -> withheld transfer fees (blocks CloseAccount)
+        if config.token_2022_ratio:
+            for i in range(config.num_accounts):
+                if rng_2022.random() < config.token_2022_ratio:
+                    self.is_2022[i] = 1
+                    if rng_2022.random() < 0.25:
+                        self.withheld[i] = rng_2022.randrange(1, 10**6)
+
+        self.index_by_address = {address: i for i, address in enumerate(self.addresses)}
+        self.accounts_by_owner = {}
+        for i, owner_index in enumerate(owner_indexes):
+            self.accounts_by_owner.setdefault(owner_index, []).append(i)
+
+    def zombies_of(self, owner: str) -> list[str]:
+        """Empty accounts of `owner` that can be closed."""
+        owner_index = self.owners.index(owner)
+        return [self.addresses[i] for i in self.accounts_by_owner.get(owner_index, []) if self.amounts[i] == 0 and i not in self.withheld]
+
+    def blocked_of(self, owner: str) -> list[str]:
+        """Empty accounts of `owner` that hold withheld transfer fees."""
+        owner_index = self.owners.index(owner)
+        return [self.addresses[i] for i in self.accounts_by_owner.get(owner_index, []) if self.amounts[i] == 0 and i in self.withheld]
+
+    def program_of(self, i: int) -> str:
+        return TOKEN_2022_PROGRAM_ID_STR if self.is_2022[i] else TOKEN_PROGRAM_ID_STR
+
+    def space_of(self, i: int) -> int:
+        return TOKEN_2022_ACCOUNT_LEN if self.is_2022[i] else TOKEN_ACCOUNT_LEN
+
+    # --- Account Encoding ---
+    def raw_data(self, i: int) -> bytes:
+        """SPL Token account layout (165 bytes)."""
+        return (
+            bytes(Pubkey.from_string(self.mints[self.account_mint[i]]))
+            + bytes(Pubkey.from_string(self.owners[self.account_owner[i]]))
+            + struct.pack("<Q", self.amounts[i])
+            + b"\x00" * 36 # delegate: None
+            + b"\x01" # state: Initialized
+            + b"\x00" * 12 # is_native: None
+            + b"\x00" * 8 # delegated_amount
+            + b"\x00" * 36 # close_authority: None
+            + (self._extensions(i) if self.is_2022[i] else b"")
+        )
+
+    def _extensions(self, i: int) -> bytes:
+        return (
+            b"\x02" # AccountType::Account
+            + struct.pack("<HH", 7, 0) # ImmutableOwner
+            + struct.pack("<HHQ", 2, 8, self.withheld.get(i, 0)) # TransferFeeAmount
+        )
+
+    def _data_json(self, i: int, encoding: str, data_slice: dict | None) -> str:
+        if encoding == "jsonParsed":
+            amount = self.amounts[i]
+            decimals = self.decimals[i]
+            ui_amount = amount / 10**decimals
+            extensions = ""
+            if self.is_2022[i]:
+                extensions = ('"extensions":[{"extension":"immutableOwner"},'
+                              '{"extension":"transferFeeAmount","state":{"withheldAmount":%d}}],' % self.withheld.get(i, 0))
+            return (
+                '{"parsed":{"info":{%s"isNative":false,"mint":"%s","owner":"%s","state":"initialized",'
+                '"tokenAmount":{"amount":"%d","decimals":%d,"uiAmount":%r,"uiAmountString":"%s"}},'
+                '"type":"account"},"program":"%s","space":%d}'
+                % (extensions, self.mints[self.account_mint[i]], self.owners[self.account_owner[i]],
+                   amount, decimals, ui_amount, repr(ui_amount), "spl-token-2022" if self.is_2022[i] else "spl-token", self.space_of(i))
+            )
+        raw = self.raw_data(i)
+        if data_slice:
+            offset = data_slice.get("offset", 0)
+            raw = raw[offset:offset + data_slice.get("length", len(raw))]
+        return '["%s","base64"]' % base64.b64encode(raw).decode()
+
+    def account_json(self, i: int, encoding: str = "base64", data_slice: dict | None = None) -> str:
+        return (
+            '{"data":%s,"executable":false,"lamports":%d,"owner":"%s","rentEpoch":%d,"space":%d}'
+            % (self._data_json(i, encoding, data_slice),
+               TOKEN_2022_ACCOUNT_RENT_LAMPORTS if self.is_2022[i] else TOKEN_ACCOUNT_RENT_LAMPORTS,
+               self.program_of(i), U64_MAX, self.space_of(i))
+        )
+
+    def keyed_account_json(self, i: int, encoding: str, data_slice: dict | None) -> str:
+        return '{"account":%s,"pubkey":"%s"}' % (self.account_json(i, encoding, data_slice), self.addresses[i])
+
+    def matches_filters(self, i: int, filters: list[dict]) -> bool:
+        for f in filters:
+            if "dataSize" in f and f["dataSize"] != self.space_of(i):
+                return False
+            if "memcmp" in f:
+                memcmp = f["memcmp"]
+                if memcmp.get("encoding") == "base64":
+                    expected = base64.b64decode(memcmp["bytes"])
+                else:
+                    expected = b58decode(memcmp["bytes"])
+                offset = memcmp["offset"]
+                if self.raw_data(i)[offset:offset + len(expected)] != expected:
+                    return False
+        return True
+
+class MockRpcHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so pooled clients behave like production
+    disable_nagle_algorithm = True # Headers and body are separate writes; avoid delayed-ACK stalls
+    chain: SyntheticChain = None
+    config: ChainConfig = None
+    rng = random.Random(0)
+    slot = 250_000_000
+    response_cache: dict = {}
+    cache_lock = threading.Lock()
+    request_slots: threading.BoundedSemaphore | None = None # Set when config.max_concurrency is
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output clean
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.request_slots is None:
+            self._handle(body)
+            return
+        with self.request_slots:
+            self._handle(body)
+
+    def _handle(self, body: bytes):
+        config = self.config
+
+        delay = config.latency_ms + (self.rng.random() * config.jitter_ms if config.jitter_ms else 0.0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if config.rate_limit_ratio and self.rng.random() < config.rate_limit_ratio:
+            self._send(429, b'{"jsonrpc":"2.0","error":{"code":429,"message":"Too many requests"},"id":null}')
+            return
+
+        request = json.loads(body)
+        if isinstance(request, list):
+            payload = b"[" + b",".join(self._dispatch(r) for r in request) + b"]"
+        else:
+            payload = self._dispatch(request)
+        self._send(200, payload)
+
+    def _send(self, status: int, payload: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _dispatch(self, request: dict) -> bytes:
+        method = request.get("method")
+        params = request.get("params") or []
+        request_id = json.dumps(request.get("id"))
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None:
+            return ('{"jsonrpc":"2.0","error":{"code":-32601,"message":"Method not found"},"id":%s}' % request_id).encode()
+
+        # Large scan results are rendered once per distinct request and reused
+        cacheable = method in ("getProgramAccounts", "getTokenAccountsByOwner")
+        key = (method, json.dumps(params, sort_keys=True)) if cacheable else None
+        if key is not None:
+            with self.cache_lock:
+                result = self.response_cache.get(key)
+            if result is None:
+                result = handler(params).encode()
+                with self.cache_lock:
+                    self.response_cache[key] = result
+        else:
+            result = handler(params).encode()
+        return b'{"jsonrpc":"2.0","result":' + result + b',"id":' + request_id.encode() + b"}"
+
+    def _context(self) -> str:
+        return '{"apiVersion":"1.18.0","slot":%d}' % self.slot
+
+    # --- RPC Methods ---
+    def rpc_getProgramAccounts(self, params: list) -> str:
+        options = params[1] if len(params) > 1 else {}
+        encoding = options.get("encoding", "base64")
+        data_slice = options.get("dataSlice")
+        filters = options.get("filters", [])
+        if params[0] not in (TOKEN_PROGRAM_ID_STR, TOKEN_2022_PROGRAM_ID_STR):
+            return "[]"
+        chain = self.chain
+        is_2022 = params[0] == TOKEN_2022_PROGRAM_ID_STR
+        items = [
+            chain.keyed_account_json(i, encoding, data_slice)
+            for i in range(len(chain.addresses))
+            if chain.is_2022[i] == is_2022 and (not filters or chain.matches_filters(i, filters))
+        ]
+        return "[" + ",".join(items) + "]"
+
+    def rpc_getTokenAccountsByOwner(self, params: list) -> str:
+        owner, program_filter = params[0], params[1]
+        options = params[2] if len(params) > 2 else {}
+        chain = self.chain
+        indexes = []
+        program_id = program_filter.get("programId")
+        if program_id in (None, TOKEN_PROGRAM_ID_STR, TOKEN_2022_PROGRAM_ID_STR) and owner in chain.owners:
+            indexes = chain.accounts_by_owner.get(chain.owners.index(owner), [])
+            if program_id:
+                indexes = [i for i in indexes if chain.program_of(i) == program_id]
+            mint = program_filter.get("mint")
+            if mint:
+                indexes = [i for i in indexes if chain.mints[chain.account_mint[i]] == mint]
+        items = [chain.keyed_account_json(i, options.get("encoding", "base64"), options.get("dataSlice")) for i in indexes]
+        return '{"context":%s,"value":[%s]}' % (self._context(), ",".join(items))
+
+    def rpc_getMultipleAccounts(self, params: list) -> str:
+        options = params[1] if len(params) > 1 else {}
+        chain = self.chain
+        values = []
+        for address in params[0]:
+            i = chain.index_by_address.get(address)
+            values.append("null" if i is None else chain.account_json(i, options.get("encoding", "base64"), options.get("dataSlice")))
+        return '{"context":%s,"value":[%s]}' % (self._context(), ",".join(values))
+
+    def rpc_getLatestBlockhash(self, params: list) -> str:
+        blockhash = str(Pubkey(self.rng.randbytes(32)))
+        return '{"context":%s,"value":{"blockhash":"%s","lastValidBlockHeight":%d}}' % (self._context(), blockhash, self.slot + 150)
+
+    def rpc_getRecentPrioritizationFees(self, params: list) -> str:
+        fees = ['{"slot":%d,"prioritizationFee":%d}' % (self.slot - n, self.config.priority_fee + n * 10) for n in range(150)]
+        return "[" + ",".join(fees) + "]"
+
+    def rpc_getFeeForMessage(self, params: list) -> str:
+        return '{"context":%s,"value":5000}' % self._context()
+
+    def rpc_getMinimumBalanceForRentExemption(self, params: list) -> str:
+        return str(TOKEN_ACCOUNT_RENT_LAMPORTS)
+
+    def rpc_getBlockHeight(self, params: list) -> str:
+        return str(self.slot)
+
+    def rpc_getSlot(self, params: list) -> str:
+        return str(self.slot)
+
+    def rpc_sendTransaction(self, params: list) -> str:
+        return '"%s"' % Signature.from_bytes(self.rng.randbytes(64))
+
+    def rpc_getSignaturesForAddress(self, params: list) -> str:
+        # The synthetic chain never changes: every address has one fixed newest signature
+        signature = str(Signature.from_bytes(hashlib.sha512(params[0].encode()).digest()))
+        options = params[1] if len(params) > 1 else {}
+        if options.get("until") == signature:
+            return "[]"
+        return ('[{"signature":"%s","slot":%d,"err":null,"memo":null,"blockTime":null,"confirmationStatus":"finalized"}]'
+                % (signature, self.slot))
+
+    def rpc_getSignatureStatuses(self, params: list) -> str:
+        status = '{"slot":%d,"confirmations":null,"err":null,"status":{"Ok":null},"confirmationStatus":"finalized"}' % self.slot
+        return '{"context":%s,"value":[%s]}' % (self._context(), ",".join(status for _ in params[0]))
+
+def _serve(config: ChainConfig, port_queue):
+    MockRpcHandler.config = config
+    MockRpcHandler.chain = SyntheticChain(config)
+    if config.max_concurrency:
+        MockRpcHandler.request_slots = threading.BoundedSemaphore(config.max_concurrency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockRpcHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+class MockRpcServer:
+    """Runs the synthetic RPC in a child process. Usable as a context manager."""
+    def __init__(self, config: ChainConfig | None = None):
+        self.config = config or ChainConfig()
+        # The parent keeps its own copy of the chain so callers can pick owners and expected zombies
+        self.chain = SyntheticChain(self.config)
+        self._process = None
+        self.url = None
+
+    def start(self, timeout: float = 600.0):
+        context = multiprocessing.get_context("spawn")
+        port_queue = context.Queue()
+        self._process = context.Process(target=_serve, args=(self.config, port_queue), daemon=True)
+        self._process.start()
+        port = port_queue.get(timeout=timeout)
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def describe(self) -> dict:
+        return asdict(self.config)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the synthetic Solana RPC server")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--zombie-ratio", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = ChainConfig(num_accounts=args.accounts, num_owners=args.owners, zombie_ratio=args.zombie_ratio,
+                         latency_ms=args.latency_ms, rate_limit_ratio=args.rate_limit_ratio)
+    with MockRpcServer(config) as server:
+        print(f"Mock RPC listening on {server.url} (whale owner: {server.chain.owners[0]})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
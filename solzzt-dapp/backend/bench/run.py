@@ -0,0 +1,286 @@
+"""
+Offline benchmark suite for the SolZZT backend and agent.
+
+Starts the synthetic RPC (bench/mock_rpc.py) for each dataset size and measures
+throughput, latency percentiles and peak RSS of the hot paths. Each scenario runs
+in a fresh process so its peak RSS is its own.
+
+    cd solzzt-dapp/backend
+    python -m bench.run --accounts 10,1000,100000 --iterations 5
+    python -m bench.run --accounts 1000 --compare bench/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.mock_rpc import ChainConfig, MockRpcServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENT_DIR = os.path.dirname(os.path.dirname(BACKEND_DIR))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+SCENARIOS = ("sniff", "sweep_build", "watcher_cycle", "api_sniff", "api_sniff_gzip", "api_sniff_msgpack", "api_sweep",
+             "api_responsiveness", "api_sniff_under_watcher", "agent_sniff")
+# Same /sniff call, one scenario per negotiated representation
+API_SNIFF_HEADERS = {
+    "api_sniff": {"accept-encoding": "identity"},
+    "api_sniff_gzip": {"accept-encoding": "gzip"},
+    "api_sniff_msgpack": {"accept": "application/msgpack", "accept-encoding": "identity"},
+}
+
+def summarize(latencies: list[float], units: int) -> dict:
+    ordered = sorted(latencies)
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    total = sum(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "p50_s": percentile(50),
+        "p90_s": percentile(90),
+        "p99_s": percentile(99),
+        "max_s": ordered[-1],
+        "ops_per_s": len(ordered) / total if total else 0.0,
+        "units_per_s": units * len(ordered) / total if total else 0.0,
+    }
+
+# --- Scenarios (run inside a fresh child process) ---
+
+def _reset_watched_wallet(owner: str):
+    """Watches `owner` with a zero threshold, back in "idle", so the next cycle does a full scan + bundle build."""
+    from sqlmodel import Session
+    from app.database import Wallet, engine
+    with Session(engine) as session:
+        wallet = session.get(Wallet, owner) or Wallet(address=owner, threshold_sol=0.0)
+        wallet.status = "idle"
+        session.add(wallet)
+        session.commit()
+
+async def _timed(fn, iterations: int) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+async def _run_scenario(name: str, url: str, owner: str, zombies: list[str], num_accounts: int, iterations: int) -> dict:
+    from solana.rpc.async_api import AsyncClient
+    from solders.pubkey import Pubkey
+
+    owner_pubkey = Pubkey.from_string(owner)
+
+    if name == "agent_sniff":
+        sys.path.insert(0, AGENT_DIR)
+        from sniffer import Sniffer as AgentSniffer
+        async with AsyncClient(url) as client:
+            sniffer = AgentSniffer(client, url)
+            latencies = await _timed(lambda: sniffer.sniff_accounts(owner_pubkey), iterations)
+        return summarize(latencies, len(zombies))
+
+    if name in API_SNIFF_HEADERS or name in ("api_sweep", "api_responsiveness", "api_sniff_under_watcher"):
+        import httpx
+        os.environ["SOLANA_RPC_URL"] = url
+        import main
+        async with main.lifespan(main.app):
+            main.watcher_instance.is_running = False # Measure the endpoint, not the background loop
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as api:
+                if name in API_SNIFF_HEADERS:
+                    sizes, media_types = [], []
+                    async def call():
+                        response = await api.get(f"/sniff/{owner}", headers=API_SNIFF_HEADERS[name])
+                        response.raise_for_status()
+                        sizes.append(response.num_bytes_downloaded) # On the wire, before decompression
+                        media_types.append(response.headers["content-type"])
+                    cpu_start = time.process_time()
+                    stats = summarize(await _timed(call, iterations), num_accounts)
+                    # Includes the scan itself; compare scenarios with each other, not with `sniff`
+                    stats["cpu_s_per_op"] = (time.process_time() - cpu_start) / iterations
+                    stats["response_bytes"] = sizes[-1]
+                    stats["media_type"] = media_types[-1] # api_sniff_msgpack gets JSON without the msgpack package
+                    return stats
+                if name == "api_sniff_under_watcher":
+                    # The watcher rescans the same whale back to back in the background lane, like a
+                    # long watch list would, while user /sniff calls are timed
+                    async def churn():
+                        while True:
+                            _reset_watched_wallet(owner)
+                            main.watcher_instance.forget(owner)
+                            await main.watcher_instance.scan_wallets()
+                    background = asyncio.create_task(churn())
+                    await asyncio.sleep(0.2) # Let the first cycle reach the provider
+                    try:
+                        async def call():
+                            response = await api.get(f"/sniff/{owner}", headers=API_SNIFF_HEADERS["api_sniff"])
+                            response.raise_for_status()
+                        return summarize(await _timed(call, iterations), num_accounts)
+                    finally:
+                        background.cancel()
+                        await asyncio.gather(background, return_exceptions=True)
+                if name == "api_responsiveness":
+                    # Probe a trivial endpoint every 10ms while big scans run. The probe cycle
+                    # includes the sleep, so event loop stalls show up as latency.
+                    latencies = []
+                    for _ in range(iterations):
+                        scan = asyncio.create_task(api.get(f"/sniff/{owner}"))
+                        while not scan.done():
+                            start = time.perf_counter()
+                            await api.get("/metrics")
+                            await asyncio.sleep(0.01) # In-process ASGI calls never yield; let the scan run
+                            latencies.append(time.perf_counter() - start - 0.01)
+                        await scan
+                    return summarize(latencies, 1)
+                async def call():
+                    response = await api.post("/sweep", json={"wallet_address": owner, "zombie_accounts": zombies})
+                    response.raise_for_status()
+                    job = response.json()
+                    while job["status"] in ("queued", "running"):
+                        response = await api.get(f"/sweep/{job['job_id']}", params={"wait": 30})
+                        job = response.json()
+                    assert job["status"] == "done", job["error"]
+                return summarize(await _timed(call, iterations), len(zombies))
+
+    from app.sniffer import Sniffer
+    from app.sweeper import Sweeper
+    async with AsyncClient(url) as client:
+        sniffer = Sniffer(client, url)
+        sweeper = Sweeper(client)
+
+        if name == "sniff":
+            return summarize(await _timed(lambda: sniffer.sniff_accounts(owner_pubkey), iterations), num_accounts)
+
+        if name == "sweep_build":
+            async def build():
+                ixs = sweeper.create_close_instructions(zombies, owner_pubkey)
+                await sweeper.build_transactions(ixs, owner_pubkey)
+            return summarize(await _timed(build, iterations), len(zombies))
+
+        if name == "watcher_cycle":
+            from app.database import create_db_and_tables
+            from app.watcher import Watcher
+            create_db_and_tables()
+            watcher = Watcher(sniffer, sweeper)
+            async def cycle():
+                # Reset so every cycle does a full scan + bundle build
+                _reset_watched_wallet(owner)
+                watcher.forget(owner)
+                await watcher.scan_wallets()
+            return summarize(await _timed(cycle, iterations), 1)
+
+    raise ValueError(f"Unknown scenario: {name}")
+
+def run_scenario(name: str, url: str, owner: str, zombies: list[str], num_accounts: int, iterations: int) -> dict:
+    # Isolated working dir: app.database creates wallets.db relative to the CWD
+    os.chdir(tempfile.mkdtemp(prefix="solzzt-bench-"))
+    sys.path.insert(0, BACKEND_DIR)
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull # The agent prints per account; keep it out of the timings
+    try:
+        result = asyncio.run(_run_scenario(name, url, owner, zombies, num_accounts, iterations))
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    result["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return result
+
+# --- Runner ---
+
+def run_suite(args) -> dict:
+    results = {
+        "version": 1,
+        "created_at": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": [],
+    }
+    context = multiprocessing.get_context("spawn")
+    for num_accounts in args.accounts:
+        config = ChainConfig(
+            num_accounts=num_accounts,
+            num_owners=args.owners,
+            zombie_ratio=args.zombie_ratio,
+            owner_distribution=args.distribution,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            rate_limit_ratio=args.rate_limit_ratio,
+            max_concurrency=args.max_concurrency,
+        )
+        print(f"📦 Generating {num_accounts} synthetic accounts...")
+        with MockRpcServer(config) as server:
+            owner = server.chain.owners[0]
+            zombies = server.chain.zombies_of(owner)
+            for name in args.scenarios:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    try:
+                        stats = pool.submit(run_scenario, name, server.url, owner, zombies, num_accounts, args.iterations).result()
+                    except Exception as e:
+                        print(f"❌ {name} @ {num_accounts}: {type(e).__name__} - {e}")
+                        continue
+                run = {"scenario": name, "accounts": num_accounts, "owner_zombies": len(zombies), "chain": server.describe(), **stats}
+                results["runs"].append(run)
+                print(f"  {name:<14} accounts={num_accounts:<8} p50={stats['p50_s'] * 1000:9.2f}ms "
+                      f"p99={stats['p99_s'] * 1000:9.2f}ms rss={stats['peak_rss_bytes'] / 2**20:8.1f}MiB")
+    return results
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a line per scenario whose p50 or peak RSS regressed by more than threshold."""
+    previous = {(r["scenario"], r["accounts"]): r for r in baseline.get("runs", [])}
+    regressions = []
+    for run in current["runs"]:
+        old = previous.get((run["scenario"], run["accounts"]))
+        if not old:
+            continue
+        for metric in ("p50_s", "peak_rss_bytes"):
+            if old[metric] and run[metric] > old[metric] * (1 + threshold):
+                change = (run[metric] / old[metric] - 1) * 100
+                regressions.append(f"{run['scenario']} @ {run['accounts']}: {metric} +{change:.1f}%")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SolZZT offline benchmark suite")
+    parser.add_argument("--accounts", type=lambda v: [int(x) for x in v.split(",")], default=[10, 1000, 10000],
+                        help="Comma-separated dataset sizes (10 to 1000000)")
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--zombie-ratio", type=float, default=0.3)
+    parser.add_argument("--distribution", choices=("zipf", "uniform"), default="zipf")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Requests the mock RPC serves at once, like a provider plan (default: unlimited)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=list(SCENARIOS))
+    parser.add_argument("--output", type=str, help="Results path (default: bench/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", type=str, help="Baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression ratio (default: 0.10)")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{int(results['created_at'])}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"⚠️ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
+import json
 import asyncio
+import base64
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from solders.pubkey import Pubkey
@@ -14,20 +17,27 @@ from app.sniffer import Sniffer
 from app.sweeper import Sweeper
 from app.database import create_db_and_tables, get_session, Wallet, engine
 from app.watcher import Watcher
+from app.jobs import QueueFull, SweepJob, SweepJobQueue
+from app.events import status_hub, wallet_status
+from app.encoding import negotiated_response
+from app.metrics import REGISTRY
 
 # --- Configuration ---
 RPC_URL = os.getenv("SOLANA_RPC_URL", "https://devnet.helius-rpc.com/?api-key=929876d8-c714-47d1-a1d4-6541ac589e56")
+MAX_SWEEP_WAIT_SECONDS = 30.0 # Upper bound for long polling GET /sweep/{job_id}?wait=
+SSE_KEEPALIVE_SECONDS = 15.0 # Comment line so proxies keep idle event streams open
 
 # --- Global State ---
 rpc_client: AsyncClient = None
 sniffer_instance: Sniffer = None
 sweeper_instance: Sweeper = None
 watcher_instance: Watcher = None
+sweep_queue: SweepJobQueue = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global rpc_client, sniffer_instance, sweeper_instance, watcher_instance
+    global rpc_client, sniffer_instance, sweeper_instance, watcher_instance, sweep_queue
     print(f"[Backend] Starting up... Initializing RPC client with {RPC_URL}")
     
     create_db_and_tables()
@@ -35,6 +45,8 @@ async def lifespan(app: FastAPI):
     rpc_client = AsyncClient(RPC_URL)
     sniffer_instance = Sniffer(rpc_client, RPC_URL)
     sweeper_instance = Sweeper(rpc_client)
+    sweep_queue = SweepJobQueue(sweeper_instance)
+    sweep_queue.start()
     
     # Initialize and start Watcher
     watcher_instance = Watcher(sniffer_instance, sweeper_instance)
@@ -46,6 +58,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     if watcher_instance:
         watcher_instance.is_running = False
+    if sweep_queue:
+        await sweep_queue.stop()
+    if sniffer_instance:
+        sniffer_instance.decoder.shutdown()
     if rpc_client:
         await rpc_client.close()
         print("[Backend] RPC client closed.")
@@ -73,13 +89,19 @@ class SniffResponse(BaseModel):
     total_sol_recoverable: float
     dust: List[dict]
     active: List[dict]
+    blocked: List[str] = [] # Empty but not closable yet (withheld Token-2022 fees, confidential balance, close authority)
 
 class SweepRequest(BaseModel):
     wallet_address: str
     zombie_accounts: List[str]
 
-class SweepResponse(BaseModel):
-    transactions: List[str]
+class SweepJobResponse(BaseModel):
+    job_id: str
+    status: str # queued, running, done or failed
+    deduplicated: bool = False # An identical job for this wallet was already in flight
+    transactions: List[str] = []
+    stale_accounts: List[str] = [] # Dropped by pre-flight verification (closed, refilled, not owned or blocked)
+    error: Optional[str] = None
 
 class WatchRequest(BaseModel):
     wallet_address: str
@@ -99,34 +121,70 @@ class WalletStatusResponse(BaseModel):
 
 # --- API Endpoints ---
 
+# Responses honour Accept (application/msgpack for raw key and transaction bytes) and
+# Accept-Encoding (br, gzip); the models below document the JSON shape.
+
 @app.get("/sniff/{wallet_address}", response_model=SniffResponse)
-async def sniff_wallet(wallet_address: str):
+async def sniff_wallet(wallet_address: str, request: Request):
     try:
         owner_pubkey = Pubkey.from_string(wallet_address)
         results = await sniffer_instance.sniff_accounts(owner_pubkey)
-        return SniffResponse(
-            zombies=results.get("zombie", []),
-            total_sol_recoverable=results.get("total_recoverable_sol", 0.0),
-            dust=results.get("dust", []),
-            active=results.get("active", [])
-        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid wallet address: {e}")
     except Exception as e:
         print(f"ERROR: Sniffing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/sweep", response_model=SweepResponse)
-async def sweep_accounts(request: SweepRequest):
+    def build(binary: bool) -> dict:
+        # The AccountStore views build base58 strings only here, and not at all for binary clients
+        keys = (lambda view: list(view.raw())) if binary else list
+        return {
+            "zombies": keys(results["zombie"]),
+            "total_sol_recoverable": results["total_recoverable_sol"],
+            "dust": keys(results["dust"]),
+            "active": keys(results["active"]),
+            "blocked": keys(results["blocked"]),
+        }
+    return negotiated_response(request, build)
+
+def _sweep_job_response(request: Request, job: SweepJob, deduplicated: bool = False, status_code: int = 200):
+    def build(binary: bool) -> dict:
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "deduplicated": deduplicated,
+            "transactions": [base64.b64decode(tx) for tx in job.transactions] if binary else job.transactions,
+            "stale_accounts": [bytes(Pubkey.from_string(address)) for address in job.stale_accounts] if binary else job.stale_accounts,
+            "error": job.error,
+        }
+    return negotiated_response(request, build, status_code)
+
+@app.post("/sweep", response_model=SweepJobResponse, status_code=202)
+async def sweep_accounts(sweep: SweepRequest, request: Request):
+    """Queues a sweep job; poll GET /sweep/{job_id} for the transactions."""
     try:
-        owner_pubkey = Pubkey.from_string(request.wallet_address)
-        instructions = sweeper_instance.create_close_instructions(request.zombie_accounts, owner_pubkey)
-        # Pass owner_pubkey as payer placeholder for unsigned tx
-        unsigned_txs_base64 = await sweeper_instance.build_transactions(instructions, owner_pubkey)
-        return SweepResponse(transactions=unsigned_txs_base64)
-    except Exception as e:
-        print(f"ERROR: Sweeping failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        Pubkey.from_string(sweep.wallet_address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid wallet address: {e}")
+    for address in sweep.zombie_accounts: # Reject here, not as a failed job after queueing
+        try:
+            Pubkey.from_string(address)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid zombie account address {address!r}: {e}")
+    try:
+        job, deduplicated = sweep_queue.submit(sweep.wallet_address, sweep.zombie_accounts)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Sweep queue is full ({e}). Retry shortly.", headers={"Retry-After": "5"})
+    return _sweep_job_response(request, job, deduplicated, status_code=202)
+
+@app.get("/sweep/{job_id}", response_model=SweepJobResponse)
+async def get_sweep_job(job_id: str, request: Request, wait: float = 0.0):
+    """Returns a sweep job. With `wait`, holds the request until the job finishes (up to 30s)."""
+    job = sweep_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sweep job not found (unknown or expired)")
+    await sweep_queue.wait(job, min(max(wait, 0.0), MAX_SWEEP_WAIT_SECONDS))
+    return _sweep_job_response(request, job)
 
 # --- New Auto-Maintenance Endpoints ---
 
@@ -147,6 +205,10 @@ async def watch_wallet(request: WatchRequest, session: Session = Depends(get_ses
             msg = f"Started monitoring {request.wallet_address}"
         
         session.commit()
+        if watcher_instance:
+            watcher_instance.forget(request.wallet_address) # New threshold: next cycle rescans and rebuilds
+        wallet = session.get(Wallet, request.wallet_address)
+        status_hub.publish(wallet.address, wallet_status(wallet))
         # Trigger an immediate scan in background (optional optimization)
         # asyncio.create_task(watcher_instance.scan_wallets()) 
         return WatchResponse(status="success", message=msg)
@@ -154,17 +216,53 @@ async def watch_wallet(request: WatchRequest, session: Session = Depends(get_ses
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/watch/{wallet_address}", response_model=WalletStatusResponse)
-async def get_watch_status(wallet_address: str, session: Session = Depends(get_session)):
+async def get_watch_status(wallet_address: str, request: Request, session: Session = Depends(get_session)):
     """Checks the status of an auto-monitored wallet."""
     wallet = session.get(Wallet, wallet_address)
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found in monitoring list")
-    
-    return WalletStatusResponse(
-        address=wallet.address,
-        status=wallet.status,
-        threshold_sol=wallet.threshold_sol,
-        recoverable_sol=wallet.recoverable_sol,
-        bundle_ready=(wallet.status == "bundle_ready"),
-        bundle_tx=wallet.bundle_base64 if wallet.status == "bundle_ready" else None
-    )
+
+    def build(binary: bool) -> dict:
+        status = wallet_status(wallet)
+        if binary and status["bundle_tx"] is not None:
+            status["bundle_tx"] = base64.b64decode(status["bundle_tx"])
+        return status
+    return negotiated_response(request, build)
+
+@app.get("/watch/{wallet_address}/events")
+async def watch_status_events(wallet_address: str, session: Session = Depends(get_session)):
+    """
+    Server-Sent Events stream of a watched wallet's status. Sends the stored status
+    once, then every change the Watcher publishes (scanning, idle, bundle_ready).
+    """
+    # Subscribe before reading the snapshot so no change can slip in between
+    queue = status_hub.subscribe(wallet_address)
+    wallet = session.get(Wallet, wallet_address)
+    if not wallet:
+        status_hub.unsubscribe(wallet_address, queue)
+        raise HTTPException(status_code=404, detail="Wallet not found in monitoring list")
+    snapshot = wallet_status(wallet)
+    session.close() # The stream can stay open for hours; don't hold the session
+
+    async def stream():
+        try:
+            yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+        finally:
+            status_hub.unsubscribe(wallet_address, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- Observability ---
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Exposes RPC, pipeline and watcher metrics in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,48 @@
+import sys
+from solders.pubkey import Pubkey
+
+from app.accounts import AccountStore, ZOMBIE, ACTIVE
+from app.sweeper import Sweeper
+
+
+def _store_with(zombies: int, active: int) -> tuple[AccountStore, list[Pubkey]]:
+    store = AccountStore(rent_exemption_sol=0.002039)
+    keys = [Pubkey.new_unique() for _ in range(zombies + active)]
+    for i, key in enumerate(keys):
+        if i < zombies:
+            store.append(bytes(key), 0, 6, ZOMBIE)
+        else:
+            store.append(bytes(key), 1_500_000, 6, ACTIVE)
+    return store, keys
+
+
+def test_store_keeps_legacy_result_shape():
+    """`results["zombie"]` and friends still behave like the old lists."""
+    store, keys = _store_with(zombies=2, active=1)
+
+    assert list(store["zombie"]) == [str(keys[0]), str(keys[1])]
+    assert store["zombie"][1] == str(keys[1])
+    assert list(store["active"]) == [{"address": str(keys[2]), "balance": 1.5}]
+    assert len(store.get("dust")) == 0
+    assert store["total_recoverable_sol"] == 2 * 0.002039
+    assert store.get("zombies") is None
+
+
+def test_sweeper_reads_packed_pubkeys():
+    store, keys = _store_with(zombies=3, active=2)
+    owner = Pubkey.new_unique()
+
+    ixs = Sweeper(rpc_client=None).create_close_instructions(store["zombie"], owner)
+
+    assert [ix.accounts[0].pubkey for ix in ixs] == keys[:3]
+
+
+def test_store_is_much_smaller_than_dicts():
+    store, keys = _store_with(zombies=5000, active=5000)
+    legacy = [{"address": str(key), "balance": 1.5} for key in keys]
+
+    store_bytes = sum(sys.getsizeof(column) for column in (store.pubkeys, store.amounts, store.decimals, store.categories))
+    legacy_bytes = sys.getsizeof(legacy) + sum(sys.getsizeof(d) + sys.getsizeof(d["address"]) + sys.getsizeof(d["balance"]) for d in legacy)
+
+    # ~42 bytes per slot against ~300 for a dict with a base58 string and a float
+    assert store_bytes * 5 <= legacy_bytes
@@ -0,0 +1,75 @@
+import base64
+import gzip
+import json
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.accounts import ZOMBIE, ACTIVE, AccountStore
+from app.encoding import COMPRESS_MIN_BYTES, brotli, choose_encoding, msgpack, negotiated_response, wants_msgpack
+
+def test_choose_encoding_honours_refusals():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("gzip;q=0, *") == ("br" if brotli else None)
+    assert choose_encoding("*;q=0.5") == ("br" if brotli else "gzip")
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack is not installed")
+def test_wants_msgpack_honours_q_values():
+    def wants(accept: str) -> bool:
+        return wants_msgpack(Request({"type": "http", "headers": [(b"accept", accept.encode())]}))
+    assert wants("application/msgpack")
+    assert wants("application/x-msgpack, application/json")
+    assert wants("application/msgpack, */*;q=0.1")
+    assert not wants("application/msgpack;q=0")
+    assert not wants("application/msgpack;q=0.5, application/json")
+    assert not wants("*/*")
+    assert not wants("")
+
+def test_negotiated_response_formats_and_compression(monkeypatch):
+    store = AccountStore()
+    for i in range(100):
+        store.append(bytes([i]) * 32, 0 if i % 2 else 5_000_000, 6, ZOMBIE if i % 2 else ACTIVE)
+    transaction = bytes(range(200))
+
+    app = FastAPI()
+    @app.get("/payload")
+    async def payload(request: Request):
+        def build(binary: bool) -> dict:
+            return {
+                "zombies": list(store["zombie"].raw()) if binary else list(store["zombie"]),
+                "transactions": [transaction] if binary else [base64.b64encode(transaction).decode()],
+            }
+        return negotiated_response(request, build)
+    client = TestClient(app)
+
+    plain = client.get("/payload", headers={"accept-encoding": "identity"})
+    assert plain.headers["content-type"] == "application/json"
+    assert "content-encoding" not in plain.headers
+    assert plain.json()["zombies"] == list(store["zombie"])
+
+    # Above the threshold and accepted: gzip on the wire, same JSON once decoded
+    compressed = client.stream("GET", "/payload", headers={"accept-encoding": "gzip"})
+    with compressed as response:
+        raw = b"".join(response.iter_raw())
+    assert len(plain.content) >= COMPRESS_MIN_BYTES
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(raw)) == plain.json()
+    assert len(raw) < len(plain.content)
+
+    binary_headers = {"accept": "application/msgpack", "accept-encoding": "identity"}
+    if msgpack is not None:
+        binary = client.get("/payload", headers=binary_headers)
+        assert binary.headers["content-type"] == "application/msgpack"
+        decoded = msgpack.unpackb(binary.content)
+        assert decoded["zombies"][0] == store.pubkey_bytes(1) # First zombie, as 32 raw bytes
+        assert decoded["transactions"] == [transaction]
+        assert len(binary.content) < len(plain.content)
+
+    # Without msgpack the same request is answered in JSON
+    monkeypatch.setattr("app.encoding.msgpack", None)
+    fallback = client.get("/payload", headers=binary_headers)
+    assert fallback.headers["content-type"] == "application/json"
+    assert fallback.json() == plain.json()
@@ -0,0 +1,29 @@
+from app.database import Wallet
+from app.events import StatusHub, wallet_status
+
+
+def test_hub_fans_out_per_wallet():
+    hub = StatusHub()
+    watched = Wallet(address="wallet-a", threshold_sol=0.1, recoverable_sol=0.5, bundle_base64="tx")
+    first, second = hub.subscribe("wallet-a"), hub.subscribe("wallet-a")
+    other = hub.subscribe("wallet-b")
+
+    hub.publish("wallet-a", wallet_status(watched, "bundle_ready"))
+
+    assert first.get_nowait() == second.get_nowait() == {
+        "address": "wallet-a", "status": "bundle_ready", "threshold_sol": 0.1,
+        "recoverable_sol": 0.5, "bundle_ready": True, "bundle_tx": "tx",
+    }
+    assert other.empty()
+
+
+def test_slow_subscriber_keeps_latest_and_unsubscribes():
+    hub = StatusHub(queue_size=2)
+    queue = hub.subscribe("wallet-a")
+
+    for status in ("scanning", "idle", "scanning"):
+        hub.publish("wallet-a", {"status": status})
+    hub.unsubscribe("wallet-a", queue)
+
+    assert [queue.get_nowait()["status"] for _ in range(2)] == ["idle", "scanning"]
+    assert hub.subscriber_count() == 0
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from app.lanes import BACKGROUND, INTERACTIVE, RpcLanes, rpc_call, rpc_lane
+from app.metrics import RPC_LANE_WAIT
+
+
+async def test_interactive_calls_overtake_background_backlog():
+    lanes = RpcLanes(max_concurrency=2, background_limit=1)
+    order = []
+
+    async def call(lane: str, name: str, hold: asyncio.Event):
+        with rpc_lane(lane):
+            async with rpc_call("getProgramAccounts", lanes):
+                order.append(name)
+                await hold.wait()
+
+    release = asyncio.Event()
+    first_background = asyncio.create_task(call(BACKGROUND, "bg-1", release))
+    second_background = asyncio.create_task(call(BACKGROUND, "bg-2", release))
+    await asyncio.sleep(0)
+    # bg-2 is over the background budget; the reserved slot still lets a user call in at once
+    assert order == ["bg-1"] and lanes.queued(BACKGROUND) == 1
+
+    user_release = asyncio.Event()
+    user = asyncio.create_task(call(INTERACTIVE, "user-1", user_release))
+    queued_user = asyncio.create_task(call(INTERACTIVE, "user-2", user_release))
+    await asyncio.sleep(0)
+    assert order == ["bg-1", "user-1"] and lanes.queued(INTERACTIVE) == 1
+
+    release.set() # bg-1 finishes: the queued user call goes before bg-2
+    await asyncio.sleep(0.01)
+    assert order == ["bg-1", "user-1", "user-2"]
+
+    user_release.set()
+    await asyncio.gather(first_background, second_background, user, queued_user)
+    assert order[-1] == "bg-2"
+    assert lanes.in_flight(INTERACTIVE) == lanes.in_flight(BACKGROUND) == 0
+
+
+async def test_cancelled_waiter_frees_its_place_and_wait_is_recorded():
+    lanes = RpcLanes(max_concurrency=1, background_limit=1)
+    before = RPC_LANE_WAIT.count(BACKGROUND)
+
+    await lanes.acquire(INTERACTIVE)
+    waiter = asyncio.create_task(lanes.acquire(INTERACTIVE))
+    background = asyncio.create_task(lanes.acquire(BACKGROUND))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    lanes.release(INTERACTIVE)
+
+    assert await background > 0
+    assert lanes.in_flight(BACKGROUND) == 1 and lanes.queued(INTERACTIVE) == 0
+    assert RPC_LANE_WAIT.count(BACKGROUND) == before + 1
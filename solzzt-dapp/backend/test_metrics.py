@@ -0,0 +1,56 @@
+import pytest
+import httpx
+from fastapi.testclient import TestClient
+
+from app.metrics import Counter, Histogram, Registry, observe_rpc, RPC_RATE_LIMITED, RPC_ERRORS
+import main
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Observations land in the first bucket whose bound is >= the value, and render cumulatively."""
+    registry = Registry()
+    histogram = registry.register(Histogram("test_latency_seconds", "Test latency.", ("method",), buckets=(0.1, 1.0)))
+
+    histogram.observe(0.05, "getSlot")
+    histogram.observe(0.1, "getSlot")
+    histogram.observe(5.0, "getSlot")
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{method="getSlot",le="0.1"} 2' in text
+    assert 'test_latency_seconds_bucket{method="getSlot",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{method="getSlot",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{method="getSlot"} 3' in text
+
+
+def test_counter_accumulates_per_label_set():
+    counter = Counter("test_total", "Test counter.", ("cache",))
+    counter.inc("blockhash")
+    counter.inc("blockhash", amount=2)
+    counter.inc("fees")
+
+    assert counter.value("blockhash") == 3
+    assert counter.value("fees") == 1
+
+
+def test_observe_rpc_counts_rate_limits():
+    """An HTTP 429 raised inside the block is counted as both an error and a rate limit."""
+    request = httpx.Request("POST", "http://rpc.invalid")
+    response = httpx.Response(429, request=request)
+    before = RPC_RATE_LIMITED.value("testMethod")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        with observe_rpc("testMethod"):
+            response.raise_for_status()
+
+    assert RPC_RATE_LIMITED.value("testMethod") == before + 1
+    assert RPC_ERRORS.value("testMethod", "HTTPStatusError") >= 1
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    # No context manager: the lifespan (RPC client, watcher loop) is not needed here
+    client = TestClient(main.app)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE solzzt_rpc_request_duration_seconds histogram" in response.text
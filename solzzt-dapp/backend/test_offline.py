@@ -0,0 +1,206 @@
+import base64
+import json
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+from solana.rpc.async_api import AsyncClient
+
+from app.sniffer import Sniffer
+from app.sweeper import Sweeper
+from app.jobs import QueueFull, SweepJob, SweepJobQueue
+from app.database import Wallet
+from app.watcher import Watcher
+from app.encoding import msgpack
+from app.decode import ParallelDecoder, classify_items, find_result_array, split_items
+from bench.mock_rpc import ChainConfig, MockRpcServer
+import main
+
+# --- Fixtures: a small synthetic chain served by the local mock RPC ---
+@pytest.fixture(scope="module")
+def mock_rpc():
+    with MockRpcServer(ChainConfig(num_accounts=200, num_owners=5, zombie_ratio=0.4, token_2022_ratio=0.3)) as server:
+        yield server
+
+@pytest.fixture
+async def rpc_client(mock_rpc):
+    client = AsyncClient(mock_rpc.url)
+    yield client
+    await client.close()
+
+async def test_sniff_finds_every_zombie(mock_rpc, rpc_client: AsyncClient):
+    """The sniffer reports exactly the synthetic owner's zero-balance accounts."""
+    owner = mock_rpc.chain.owners[0]
+    expected = mock_rpc.chain.zombies_of(owner)
+    sniffer = Sniffer(rpc_client, mock_rpc.url)
+
+    results = await sniffer.sniff_accounts(Pubkey.from_string(owner))
+
+    assert sorted(results["zombie"]) == sorted(expected)
+    assert results["total_recoverable_sol"] == pytest.approx(len(expected) * sniffer.rent_exemption_sol)
+
+async def test_build_transactions_batches_close_instructions(mock_rpc, rpc_client: AsyncClient):
+    owner = mock_rpc.chain.owners[0]
+    zombies = mock_rpc.chain.zombies_of(owner)
+    sweeper = Sweeper(rpc_client)
+    owner_pubkey = Pubkey.from_string(owner)
+
+    ixs = sweeper.create_close_instructions(zombies, owner_pubkey)
+    txs = await sweeper.build_transactions(ixs, owner_pubkey)
+
+    assert len(txs) == -(-len(zombies) // 12)
+    tx = Transaction.from_bytes(base64.b64decode(txs[0]))
+    assert tx.message.account_keys[0] == owner_pubkey # Fee payer comes first
+
+async def test_parallel_decode_matches_inline(mock_rpc, rpc_client: AsyncClient):
+    """Forcing the process pool path gives the same classification as inline decoding."""
+    owner = Pubkey.from_string(mock_rpc.chain.owners[1])
+    decoder = ParallelDecoder(max_workers=2, min_bytes=0)
+    try:
+        inline = await Sniffer(rpc_client, mock_rpc.url).sniff_accounts(owner)
+        parallel = await Sniffer(rpc_client, mock_rpc.url, decoder).sniff_accounts(owner)
+    finally:
+        decoder.shutdown()
+
+    assert sorted(parallel["zombie"]) == sorted(inline["zombie"])
+    assert sorted(a["address"] for a in parallel["active"]) == sorted(a["address"] for a in inline["active"])
+
+def test_split_items_cuts_on_item_boundaries():
+    raw = b'{"result":[' + b",".join(b'{"account":{"n":%d},"pubkey":"k%d"}' % (i, i) for i in range(50)) + b'],"id":1}'
+    start, end = find_result_array(raw)
+
+    spans = split_items(raw, start, end, chunks=4)
+
+    assert len(spans) == 4
+    items = [item for s, e in spans for item in json.loads(b"[" + raw[s:e] + b"]")]
+    assert [item["pubkey"] for item in items] == [f"k{i}" for i in range(50)]
+
+def test_classify_rejects_malformed_accounts():
+    owner = str(Pubkey.new_unique())
+    def item(pubkey, amount, decimals=6, account_owner=owner):
+        info = {"owner": account_owner, "mint": str(Pubkey.new_unique()), "tokenAmount": {"amount": amount, "decimals": decimals}}
+        return {"pubkey": pubkey, "account": {"data": {"parsed": {"info": info, "type": "account"}}, "lamports": 2039280}}
+    good = str(Pubkey.new_unique())
+    items = [
+        item(good, "0"),
+        item("not-a-pubkey", "0"),
+        item(str(Pubkey.new_unique()), "-5"),
+        item(str(Pubkey.new_unique()), "0", decimals="6"),
+        item(str(Pubkey.new_unique()), "0", account_owner=str(Pubkey.new_unique())), # Someone else's: skipped, not rejected
+        {"pubkey": str(Pubkey.new_unique()), "account": {"data": {"parsed": {"type": "mint", "info": {}}}}},
+    ]
+
+    pubkeys, amounts, decimals, categories, rejected = classify_items(items, owner)
+
+    assert pubkeys == bytes(Pubkey.from_string(good))
+    assert rejected == 3
+
+async def test_verify_zombies_drops_stale_candidates(mock_rpc, rpc_client: AsyncClient):
+    """Refilled, foreign and closed accounts are dropped before packing; real zombies are kept once."""
+    chain = mock_rpc.chain
+    owner = chain.owners[0]
+    zombies = chain.zombies_of(owner)
+    refilled = next(a for i, a in enumerate(chain.addresses) if chain.owners[chain.account_owner[i]] == owner and chain.amounts[i] > 0)
+    foreign = next(a for i, a in enumerate(chain.addresses) if chain.owners[chain.account_owner[i]] != owner)
+    closed = str(Pubkey.new_unique())
+
+    verified = await Sweeper(rpc_client).verify_zombies(zombies + zombies[:1] + [refilled, foreign, closed], Pubkey.from_string(owner))
+
+    assert [str(pubkey) for pubkey, _ in verified] == zombies
+
+async def test_token_2022_accounts_are_scanned_and_closed_by_their_program(mock_rpc, rpc_client: AsyncClient):
+    """Token-2022 zombies are found next to Token ones, withheld fees block a close, and each close targets its program."""
+    chain = mock_rpc.chain
+    owner = chain.owners[0]
+    owner_pubkey = Pubkey.from_string(owner)
+    zombies, blocked = chain.zombies_of(owner), chain.blocked_of(owner)
+    assert blocked and any(chain.is_2022[chain.index_by_address[address]] for address in zombies)
+
+    results = await Sniffer(rpc_client, mock_rpc.url).sniff_accounts(owner_pubkey)
+    sweeper = Sweeper(rpc_client)
+    verified = await sweeper.verify_zombies(zombies + blocked, owner_pubkey)
+    ixs = sweeper.create_close_instructions(verified, owner_pubkey)
+
+    assert sorted(results["zombie"]) == sorted(zombies)
+    assert sorted(results["blocked"]) == sorted(blocked)
+    assert [(str(account), str(program)) for account, program in verified] == [
+        (address, chain.program_of(chain.index_by_address[address])) for address in zombies
+    ]
+    assert [ix.program_id for ix in ixs] == [program for _, program in verified]
+
+async def test_both_failed_program_scans_are_reported():
+    sniffer = Sniffer(None, "http://127.0.0.1:1") # Nothing listens there: both scans fail to connect
+
+    results = await sniffer.sniff_accounts(Pubkey.new_unique())
+
+    assert "(Token)" in results.error and "(Token-2022)" in results.error
+    assert len(results) == 0
+
+async def test_sweep_queue_dedupes_and_applies_backpressure(mock_rpc, rpc_client: AsyncClient):
+    owner = mock_rpc.chain.owners[0]
+    zombies = mock_rpc.chain.zombies_of(owner)
+    queue = SweepJobQueue(Sweeper(rpc_client), workers=1, max_pending=1)
+
+    job, deduplicated = queue.submit(owner, zombies)
+    same_job, same_deduplicated = queue.submit(owner, list(reversed(zombies)))
+    with pytest.raises(QueueFull):
+        queue.submit(owner, zombies[:1]) # Different job, no room left
+
+    queue.start()
+    try:
+        await queue.wait(job, timeout=10)
+    finally:
+        await queue.stop()
+
+    assert (deduplicated, same_deduplicated, same_job) == (False, True, job)
+    assert job.status == "done"
+    assert len(job.transactions) == -(-len(zombies) // 12)
+
+async def test_watcher_skips_wallets_without_new_activity(mock_rpc, rpc_client: AsyncClient, monkeypatch):
+    """A wallet whose owner signed nothing since the last scan is not sniffed again until forgotten."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr("app.watcher.engine", engine)
+    owner = mock_rpc.chain.owners[0]
+    with Session(engine) as session:
+        session.add(Wallet(address=owner, threshold_sol=1000.0)) # Never triggers a bundle
+        session.commit()
+
+    sniffer = Sniffer(rpc_client, mock_rpc.url)
+    scans = []
+    original_sniff = sniffer.sniff_accounts
+    async def counting_sniff(owner_pubkey):
+        scans.append(owner_pubkey)
+        return await original_sniff(owner_pubkey)
+    monkeypatch.setattr(sniffer, "sniff_accounts", counting_sniff)
+    watcher = Watcher(sniffer, Sweeper(rpc_client))
+
+    await watcher.scan_wallets()
+    await watcher.scan_wallets()
+    watcher.forget(owner)
+    await watcher.scan_wallets()
+
+    assert len(scans) == 2
+
+def test_sweep_rejects_invalid_zombie_addresses():
+    client = TestClient(main.app) # No lifespan: validation fails before anything touches the RPC
+    wallet = "11111111111111111111111111111111"
+    response = client.post("/sweep", json={"wallet_address": wallet, "zombie_accounts": [wallet, "not-a-key"]})
+
+    assert response.status_code == 400
+    assert "not-a-key" in response.json()["detail"]
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack is not installed")
+def test_binary_sweep_job_carries_raw_keys():
+    job = SweepJob("11111111111111111111111111111111", [], ("key",))
+    stale = Pubkey.new_unique()
+    job.transactions, job.stale_accounts = [base64.b64encode(b"tx").decode()], [str(stale)]
+    request = Request({"type": "http", "headers": [(b"accept", b"application/msgpack")]})
+
+    response = msgpack.unpackb(main._sweep_job_response(request, job).body)
+
+    assert response["stale_accounts"] == [bytes(stale)] # 32 raw bytes, not the base58 string
+    assert response["transactions"] == [b"tx"]
@@ -66,6 +66,7 @@ export default function HomePage() {
     // Auto-Maintenance State
     const [watchThreshold, setWatchThreshold] = useState(0.1);
     const [watchStatus, setWatchStatus] = useState<any>(null);
+    const [watchStreamKey, setWatchStreamKey] = useState(0); // Bumped to (re)open the status stream
 
     const connection = useMemo(() => new Connection(RPC_URL, 'confirmed'), []);
 
@@ -103,8 +104,13 @@ export default function HomePage() {
         toast.info("Agent is building recycling transactions...");
 
         try {
-            const sweepResponse = await axios.post(`${BACKEND_URL}/sweep`, { wallet_address: publicKey.toBase58(), zombie_accounts: scanResults.zombies });
-            const transactions = sweepResponse.data.transactions.map((b64Tx: string) => Transaction.from(Buffer.from(b64Tx, 'base64')));
+            // The backend queues the build; long-poll the job until it finishes
+            let { data: job } = await axios.post(`${BACKEND_URL}/sweep`, { wallet_address: publicKey.toBase58(), zombie_accounts: scanResults.zombies });
+            while (job.status === 'queued' || job.status === 'running') {
+                ({ data: job } = await axios.get(`${BACKEND_URL}/sweep/${job.job_id}`, { params: { wait: 25 } }));
+            }
+            if (job.status === 'failed') throw new Error(job.error || 'Sweep job failed');
+            const transactions = job.transactions.map((b64Tx: string) => Transaction.from(Buffer.from(b64Tx, 'base64')));
             
             toast.info("Please approve transactions in your wallet...");
             const signedTransactions = await signAllTransactions(transactions);
@@ -119,6 +125,10 @@ export default function HomePage() {
             toast.success(`✅ Success! ${scanResults.total_sol_recoverable.toFixed(6)} SOL reclaimed.`);
             setTimeout(() => reset(), 2000);
         } catch (error: any) {
+            if (error.response?.status === 429) {
+                toast.warning("The agent is busy right now. Please try again in a few seconds.");
+                return;
+            }
             toast.error(`Recycling failed: ${error.message}`);
         } finally {
             setIsLoading(false);
@@ -134,7 +144,7 @@ export default function HomePage() {
                 threshold_sol: watchThreshold 
             });
             toast.success(`Agent is now watching for > ${watchThreshold} SOL recoverable.`);
-            fetchWatchStatus();
+            setWatchStreamKey((key) => key + 1);
         } catch (error: any) {
             toast.error(`Failed to start watching: ${error.message}`);
         }
@@ -150,14 +160,16 @@ export default function HomePage() {
         }
     };
 
-    // Poll watch status if connected
+    // Subscribe to watch status pushes if connected (the backend sends the current status first)
     useEffect(() => {
         if (connected && publicKey) {
-            fetchWatchStatus();
-            const interval = setInterval(fetchWatchStatus, 10000); // Poll every 10s
-            return () => clearInterval(interval);
+            const source = new EventSource(`${BACKEND_URL}/watch/${publicKey.toBase58()}/events`);
+            source.addEventListener('status', (event) => setWatchStatus(JSON.parse((event as MessageEvent).data)));
+            // EventSource reconnects by itself; it only closes for good when the wallet is not watched (404)
+            source.onerror = () => { if (source.readyState === EventSource.CLOSED) setWatchStatus(null); };
+            return () => source.close();
         }
-    }, [connected, publicKey]);
+    }, [connected, publicKey, watchStreamKey]);
 
     const handleExecuteBundle = async () => {
         if (!publicKey || !watchStatus?.bundle_tx || !signTransaction) return;
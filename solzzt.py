@@ -2,111 +2,290 @@ import asyncio
 import argparse
 import os
 import json
+import time
+import httpx
 from dotenv import load_dotenv
 from solders.pubkey import Pubkey
 from solders.keypair import Keypair # Import Keypair
 from solana.rpc.async_api import AsyncClient
-from solders.transaction import Transaction # Import Transaction for execute_recycle
-import base64 # Import base64 for execute_recycle
 
 # Import your modules
 from sniffer import Sniffer
-from sweeper import Sweeper
+from sweeper import Sweeper, BlockhashCache, BLOCKHASH_MAX_AGE_S, CLOSES_PER_TRANSACTION
 from reporter import Reporter
+from profiler import Profiler
 
 load_dotenv()
 
 # Define the path to the generated test wallet
 KEYPAIR_FILE = "test_wallet.json"
+# Wallets scanned at once in --wallets-file mode; public RPCs rate-limit well before this hurts
+BATCH_CONCURRENCY = 8
 
-async def execute_recycle(tx_base64_list: list[str], signer_keypair: Keypair, client: AsyncClient):
-    """Automatically signs and broadcasts the agent's findings."""
-    print(f" ⚡ AGENTIC ACTION: Starting Autonomous Recycling...")
-    for i, b64_tx in enumerate(tx_base64_list):
-        # 1. Reconstruct
-        tx_bytes = base64.b64decode(b64_tx)
-        tx = Transaction.from_bytes(tx_bytes)
+# --- Sweep Pipeline ---
+PIPELINE_QUEUE_SIZE = 4 # Batches waiting between two stages; a full queue pauses the stage feeding it
+MAX_UNCONFIRMED = 4 # Sent transactions awaiting confirmation at once
 
-        # Update the blockhash before sending, as it might have changed since building
-        latest_blockhash_resp = await client.get_latest_blockhash()
-        tx.recent_blockhash = latest_blockhash_resp.value.blockhash
+def load_keypair() -> Keypair | None:
+    """Loads the signer from KEYPAIR_FILE, or returns None (with a warning) if that is not possible."""
+    if not os.path.exists(KEYPAIR_FILE):
+        print(f"⚠️ {KEYPAIR_FILE} not found. Autonomous execution will not be possible.")
+        return None
+    try:
+        with open(KEYPAIR_FILE, 'r') as f:
+            secret_key_list = json.load(f)
+            return Keypair.from_bytes(bytes(secret_key_list))
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"⚠️ Error loading keypair from {KEYPAIR_FILE}: {e}. Autonomous execution will not be possible.")
+        return None
 
-        # Sign the transaction with the loaded keypair
-        tx.sign(signer_keypair)
-
-        # 2. Sign and Send
-        try:
-            sig_resp = await client.send_raw_transaction(bytes(tx))
-            await client.confirm_transaction(sig_resp.value)
-            print(f"✅ Executed Transaction {i+1}! Rent reclaimed into your wallet.")
-            print(f"🔗 View on Solscan: https://solscan.io/tx/{sig_resp.value}?cluster=devnet")
-        except Exception as e:
-            print(f"❌ Execution failed for Transaction {i+1}: {e}")
-
-async def run_agent(target_wallet_str: str, rpc_url: str):
+async def run_agent(target_wallet_str: str, rpc_url: str, profiler: Profiler | None = None):
+    profiler = profiler or Profiler()
     print(f"🚀 Starting SolAgent:002 (Target: {target_wallet_str})")
     
     # Initialize Clients
     async with AsyncClient(rpc_url) as client:
         owner_pubkey = Pubkey.from_string(target_wallet_str)
 
-        owner_keypair = None # Initialize owner_keypair for potential autonomous execution
-        if os.path.exists(KEYPAIR_FILE):
-            try:
-                with open(KEYPAIR_FILE, 'r') as f:
-                    secret_key_list = json.load(f)
-                    owner_keypair = Keypair.from_bytes(bytes(secret_key_list))
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"⚠️ Error loading keypair from {KEYPAIR_FILE}: {e}. Autonomous execution will not be possible.")
-        else:
-            print(f"⚠️ {KEYPAIR_FILE} not found. Autonomous execution will not be possible.")
+        # Keypair for potential autonomous execution
+        with profiler.stage("load_keypair"):
+            owner_keypair = load_keypair()
 
-        
-        # 1. SNIFF
-        sniffer = Sniffer(client, rpc_url)
-        results = await sniffer.sniff_accounts(owner_pubkey)
-        
-        # 2. REPORT
-        reporter = Reporter()
+        await run_cycle(client, rpc_url, owner_pubkey, owner_keypair, profiler)
+
+async def run_cycle(client: AsyncClient, rpc_url: str, owner_pubkey: Pubkey, owner_keypair: Keypair | None,
+                    profiler: Profiler | None = None, sniffer: Sniffer | None = None, sweeper: Sweeper | None = None,
+                    sweep: bool = True) -> dict:
+    """
+    One sniff -> report -> sweep pass. The daemon passes its long-lived sniffer and
+    sweeper; a one-shot run builds fresh ones. Returns the zombies, the number of
+    transactions sent and the confirmed signatures.
+    """
+    profiler = profiler or Profiler()
+    sniffer = sniffer or Sniffer(client, rpc_url, profiler)
+    results = {"zombie": [], "transactions": 0, "signatures": []}
+
+    if sweep and owner_keypair is None:
+        print("⚠️ Cannot build transactions: Owner Keypair not loaded. Autonomous execution will not be possible.")
+        sweep = False
+    elif sweep and owner_keypair.pubkey() != owner_pubkey:
+        print(f"⚠️ Loaded keypair {owner_keypair.pubkey()} cannot close accounts of {owner_pubkey}. Scanning only.")
+        sweep = False
+
+    # 1. SNIFF (+ SWEEP while the accounts arrive)
+    if sweep:
+        # IMPORTANT: this signs and broadcasts with the loaded keypair. Understand the implications first.
+        # One blockhash serves many transactions; fetching one per batch would serialize the sign stage
+        sweeper = sweeper or Sweeper(client, profiler, blockhash_cache=BlockhashCache(max_age_s=BLOCKHASH_MAX_AGE_S))
+        print(" ⚡ AGENTIC ACTION: Recycling zombies as they are found...")
+        with profiler.stage("pipeline"):
+            results.update(await run_sweep_pipeline(client, sniffer, sweeper, owner_keypair, profiler))
+    else:
+        with profiler.stage("sniff"):
+            results.update(await sniffer.sniff_accounts(owner_pubkey))
+    
+    # 2. REPORT
+    reporter = Reporter()
+    with profiler.stage("report"):
         reporter.generate_report(results)
-        
-        # 3. SWEEP (If Zombies found)
-        zombies = results.get("zombie", [])
-        if zombies:
-            print(f"🧹 Preparing Broom... Found {len(zombies)} accounts to close.")
-            sweeper = Sweeper(client)
-            
-            # Pass the owner_keypair to build_transactions
-            if owner_keypair:
-                ixs = sweeper.create_close_instructions(zombies, owner_pubkey)
-                txs = await sweeper.build_transactions(ixs, owner_keypair) # Pass owner_keypair here
-            else:
-                print("⚠️ Cannot build transactions: Owner Keypair not loaded. Autonomous execution will not be possible.")
-                txs = []
-            
-            if txs:
-                print(f"\n✅ GENERATED {len(txs)} UNSIGNED TRANSACTIONS")
-                print("To execute, import these Base64 strings into a wallet or sign script (or enable autonomous execution):")
-                for i, tx in enumerate(txs):
-                    print(f"\n[TX #{i+1}]: {tx[:50]}... (truncated)")
-                    # In a real agent, you might save this to a file: 'tx_queue.json'
-                
-                # If you want to go Auto-Pilot, call:
-                # IMPORTANT: ONLY UNCOMMENT THIS IF YOU UNDERSTAND THE IMPLICATIONS AND TRUST THE AGENT
-                if owner_keypair:
-                    await execute_recycle(txs, owner_keypair, client)
-                else:
-                    print("Autonomous execution skipped: Keypair not loaded or provided.")
-
-        else:
-            print("✨ Wallet is clean. No zombie accounts found.")
+
+    zombies = results["zombie"]
+    if sweep and zombies:
+        print(f"🧹 Sent {results['transactions']} transactions for {len(zombies)} zombie accounts, "
+              f"{len(results['signatures'])} confirmed.")
+    elif zombies:
+        print(f"🧟 Found {len(zombies)} zombie accounts (scan only, not sweeping).")
+    else:
+        print("✨ Wallet is clean. No zombie accounts found.")
+
+    return {"zombie": zombies, "transactions": results["transactions"], "signatures": results["signatures"]}
+
+async def run_sweep_pipeline(client: AsyncClient, sniffer: Sniffer, sweeper: Sweeper, owner_keypair: Keypair,
+                             profiler: Profiler | None = None) -> dict:
+    """
+    Sniff -> pack -> sign -> send as concurrent stages linked by bounded queues. The
+    first transactions go out while the account list is still downloading, and a slow
+    stage holds back the ones before it instead of letting batches pile up in memory.
+    Returns the sniff results plus "transactions" (sent) and "signatures" (confirmed).
+    """
+    profiler = profiler or Profiler()
+    owner_pubkey = owner_keypair.pubkey()
+    zombie_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) # Zombie batches as decoded; None ends a stage
+    ix_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) # One close batch per transaction
+    tx_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) # Signed transactions
+    signatures = []
+
+    async def sniff() -> dict:
+        with profiler.stage("sniff"):
+            results = await sniffer.sniff_accounts(owner_pubkey, on_zombies=zombie_queue.put)
+        # Only on success: when the pipeline is torn down nobody reads the queue, and a put could block forever
+        await zombie_queue.put(None)
+        return results
+
+    async def pack():
+        pending = []
+        while (zombies := await zombie_queue.get()) is not None:
+            pending.extend(zombies)
+            while len(pending) >= CLOSES_PER_TRANSACTION:
+                with profiler.stage("sweep.instructions"):
+                    ixs = sweeper.create_close_instructions(pending[:CLOSES_PER_TRANSACTION], owner_pubkey)
+                del pending[:CLOSES_PER_TRANSACTION]
+                await ix_queue.put(ixs)
+        if pending:
+            with profiler.stage("sweep.instructions"):
+                ixs = sweeper.create_close_instructions(pending, owner_pubkey)
+            await ix_queue.put(ixs)
+        await ix_queue.put(None)
+
+    async def sign():
+        batch = 0
+        while (ixs := await ix_queue.get()) is not None:
+            batch += 1
+            try:
+                with profiler.stage("execute.sign"):
+                    tx = await sweeper.sign_transaction(ixs, owner_keypair)
+            except Exception as e: # Like a failed send: skip this batch, keep sweeping the rest
+                print(f"❌ Signing failed for batch {batch} ({len(ixs)} accounts): {e}")
+                continue
+            await tx_queue.put(tx)
+        await tx_queue.put(None)
+
+    async def confirm(i: int, signature):
+        try:
+            with profiler.stage("execute.confirm"):
+                await client.confirm_transaction(signature)
+        except Exception as e:
+            print(f"❌ Confirmation failed for Transaction {i}: {e}")
+            return
+        print(f"✅ Executed Transaction {i}! Rent reclaimed into your wallet.")
+        print(f"🔗 View on Solscan: https://solscan.io/tx/{signature}?cluster=devnet")
+        signatures.append(str(signature))
+
+    async def send() -> int:
+        unconfirmed = asyncio.Semaphore(MAX_UNCONFIRMED)
+        confirmations = set()
+        built = sent = 0
+        try:
+            while (tx := await tx_queue.get()) is not None:
+                built += 1
+                await unconfirmed.acquire()
+                raw_tx = bytes(tx)
+                try:
+                    with profiler.stage("execute.send"):
+                        sig_resp = await client.send_raw_transaction(raw_tx)
+                except Exception as e:
+                    unconfirmed.release()
+                    print(f"❌ Execution failed for Transaction {built}: {e}")
+                    continue
+                sent += 1
+                profiler.add_bytes("execute.send", sent=len(raw_tx))
+                task = asyncio.create_task(confirm(built, sig_resp.value))
+                task.add_done_callback(lambda _: unconfirmed.release())
+                confirmations.add(task)
+            await asyncio.gather(*confirmations)
+        finally:
+            for task in confirmations:
+                task.cancel()
+        return sent
+
+    tasks = [asyncio.create_task(stage()) for stage in (sniff, pack, sign, send)]
+    try:
+        sniff_results, _, _, sent = await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed stage would leave the others blocked on its queue
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return {**sniff_results, "transactions": sent, "signatures": signatures}
+
+def iter_wallets(wallets_file: str):
+    """Yields wallet addresses one line at a time, so huge lists are never loaded whole. Skips blanks and # comments."""
+    with open(wallets_file, 'r') as f:
+        for line in f:
+            address = line.split("#", 1)[0].strip()
+            if address:
+                yield address
+
+async def run_batch(wallets_file: str, rpc_url: str, output_path: str, concurrency: int = BATCH_CONCURRENCY,
+                    profiler: Profiler | None = None) -> dict:
+    """
+    Scans every wallet in wallets_file with up to `concurrency` scans in flight over one
+    pooled connection. Each result is written to output_path as a JSON line as soon as
+    it is ready, so an interrupted run keeps what it already scanned.
+    """
+    profiler = profiler or Profiler()
+    wallets = iter_wallets(wallets_file)
+    totals = {"wallets": 0, "failed": 0, "zombies": 0, "recoverable_lamports": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    print(f"🚀 Starting SolAgent:002 batch scan of {wallets_file} ({concurrency} concurrent) -> {output_path}")
+
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(30.0, connect=5.0)) as http_client:
+        sniffer = Sniffer(None, rpc_url, http_client=http_client, verbose=False)
+
+        async def scan(address: str) -> dict:
+            start = time.perf_counter()
+            try:
+                results = await sniffer.sniff_accounts(Pubkey.from_string(address))
+            except ValueError as e:
+                results = {"zombie": [], "blocked": [], "active_count": 0, "recoverable_lamports": 0, "error": f"Invalid wallet address: {e}"}
+            record = {
+                "wallet": address,
+                "zombies": [str(zombie) for zombie in results["zombie"]],
+                "blocked": [str(account) for account in results["blocked"]],
+                "active_count": results["active_count"],
+                "recoverable_lamports": results["recoverable_lamports"],
+                "elapsed_s": round(time.perf_counter() - start, 4),
+            }
+            if "error" in results:
+                record["error"] = results["error"]
+            return record
+
+        async def worker(out):
+            # Workers pull from the shared generator; the event loop runs one next() at a time
+            for address in wallets:
+                record = await scan(address)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                totals["wallets"] += 1
+                totals["failed"] += "error" in record
+                totals["zombies"] += len(record["zombies"])
+                totals["recoverable_lamports"] += record["recoverable_lamports"]
+
+        with open(output_path, 'w') as out, profiler.stage("batch"):
+            await asyncio.gather(*(worker(out) for _ in range(concurrency)))
+
+    print(f"✅ Scanned {totals['wallets']} wallets ({totals['failed']} failed): {totals['zombies']} zombie accounts, "
+          f"{totals['recoverable_lamports'] / 1e9:.6f} SOL recoverable.")
+    return totals
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Solana Liquidity Recycler")
     parser.add_argument("--wallet", type=str, help="Target Wallet Address")
     parser.add_argument("--rpc", type=str, default="https://api.devnet.solana.com", help="RPC URL (default to Solana Devnet)") 
+    parser.add_argument("--profile", action="store_true", help="Record wall/CPU time, bytes and allocation peaks per stage (tracemalloc adds some overhead)")
+    parser.add_argument("--profile-output", type=str, default="solzzt_profile.json", help="Path of the JSON profile report (default: solzzt_profile.json)")
+    parser.add_argument("--profile-dump", type=str, metavar="PREFIX", help="Also write cProfile (PREFIX.prof) and tracemalloc (PREFIX.tracemalloc.txt) dumps")
+    parser.add_argument("--daemon", action="store_true", help="Stay running and take scan/sweep jobs from solzzt_client.py over a Unix socket")
+    parser.add_argument("--socket", type=str, help="Daemon socket path (default: $SOLZZT_SOCKET or solzzt-<uid>.sock in the temp dir)")
+    parser.add_argument("--wallets-file", type=str, help="Scan every wallet in this file (one address per line) instead of --wallet; scan only, no sweeping")
+    parser.add_argument("--output", type=str, default="solzzt_wallets.jsonl", help="JSON Lines results of --wallets-file (default: solzzt_wallets.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help=f"Wallets scanned at once with --wallets-file (default: {BATCH_CONCURRENCY})")
     
     args = parser.parse_args()
+    if args.daemon:
+        from daemon import DEFAULT_SOCKET, run_daemon
+        run_daemon(args.rpc, args.socket or DEFAULT_SOCKET)
+        raise SystemExit(0)
+    profiler = Profiler(enabled=args.profile or bool(args.profile_dump), dump_prefix=args.profile_dump)
+    profiler.start()
+
+    if args.wallets_file:
+        try:
+            asyncio.run(run_batch(args.wallets_file, args.rpc, args.output, max(1, args.concurrency), profiler))
+        finally:
+            profiler.write_report(args.profile_output, wallets_file=args.wallets_file, rpc=args.rpc)
+        raise SystemExit(0)
     
     # Determine the wallet to use
     target_wallet_pubkey_str = args.wallet
@@ -127,4 +306,7 @@ if __name__ == "__main__":
             target_wallet_pubkey_str = "5oNDL3swdJJF1g9DzJiZ4ynHXgszjAEpUkxVYejchzrY"
             print(f"⚠️ No wallet provided from CLI or {KEYPAIR_FILE}. Using fallback Test Wallet: {target_wallet_pubkey_str}")
 
-    asyncio.run(run_agent(target_wallet_pubkey_str, args.rpc))
+    try:
+        asyncio.run(run_agent(target_wallet_pubkey_str, args.rpc, profiler))
+    finally:
+        profiler.write_report(args.profile_output, wallet=target_wallet_pubkey_str, rpc=args.rpc)
@@ -0,0 +1,64 @@
+"""
+Thin client for the SolZZT agent daemon (`python solzzt.py --daemon`).
+Standard library only, so a cron run starts in milliseconds.
+
+    python solzzt_client.py scan --wallet <ADDRESS>
+    python solzzt_client.py sweep
+    python solzzt_client.py ping
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+DEFAULT_SOCKET = os.environ.get("SOLZZT_SOCKET", os.path.join(tempfile.gettempdir(), f"solzzt-{os.getuid()}.sock"))
+
+def request(payload: dict, socket_path: str = DEFAULT_SOCKET, timeout: float | None = None) -> dict:
+    """Sends one job to the daemon and returns its JSON response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a job to the running SolZZT daemon")
+    parser.add_argument("command", choices=("scan", "sweep", "ping", "shutdown"),
+                        help="scan: sniff and report; sweep: sniff, build, sign and send")
+    parser.add_argument("--wallet", type=str, help="Target Wallet Address (default: the daemon's keypair)")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET, help=f"Daemon socket (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for the job (default: 300)")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON response instead of the agent output")
+    args = parser.parse_args()
+
+    payload = {"command": args.command}
+    if args.wallet:
+        payload["wallet"] = args.wallet
+    try:
+        response = request(payload, args.socket, args.timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ No SolZZT daemon listening on {args.socket}. Start one with: python solzzt.py --daemon", file=sys.stderr)
+        sys.exit(2)
+    except socket.timeout:
+        print(f"❌ No answer from the daemon within {args.timeout}s.", file=sys.stderr)
+        sys.exit(2)
+
+    if args.json:
+        print(json.dumps(response, indent=2))
+    else:
+        sys.stdout.write(response.get("output", ""))
+        if "elapsed_s" in response:
+            print(f"⏱️ Job took {response['elapsed_s'] * 1000:.1f}ms in the daemon.")
+        elif response.get("ok") and len(response) > 1:
+            print(json.dumps({k: v for k, v in response.items() if k != "ok"}))
+        if not response.get("ok"):
+            print(f"❌ {response.get('error')}", file=sys.stderr)
+    sys.exit(0 if response.get("ok") else 1)
+
+if __name__ == "__main__":
+    main()
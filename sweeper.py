@@ -6,46 +6,64 @@ from solders.transaction import Transaction
 from solders.message import Message
 from spl.token.instructions import close_account, CloseAccountParams
 from spl.token.constants import TOKEN_PROGRAM_ID
-import base64
+from solders.hash import Hash
+import time
+from profiler import Profiler
+
+# Same batch as the backend sweeper; keeps every transaction well under the 1232-byte packet limit
+CLOSES_PER_TRANSACTION = 12
+BLOCKHASH_MAX_AGE_S = 20.0 # Well inside the ~60s a blockhash stays valid
+
+class BlockhashCache:
+    """
+    Reuses the latest blockhash for up to max_age_s seconds. A blockhash stays valid
+    for ~150 slots (about a minute), so a long-running agent does not need one per
+    transaction. max_age_s=0 fetches a fresh one every time.
+    """
+    def __init__(self, max_age_s: float = 0.0):
+        self.max_age_s = max_age_s
+        self._blockhash = None
+        self._fetched_at = 0.0
+
+    async def refresh(self, client: AsyncClient) -> Hash:
+        latest_blockhash_resp = await client.get_latest_blockhash()
+        self._blockhash = latest_blockhash_resp.value.blockhash
+        self._fetched_at = time.monotonic()
+        return self._blockhash
+
+    async def get(self, client: AsyncClient) -> Hash:
+        if self._blockhash is None or time.monotonic() - self._fetched_at >= self.max_age_s:
+            return await self.refresh(client)
+        return self._blockhash
 
 class Sweeper:
-    def __init__(self, client: AsyncClient):
+    def __init__(self, client: AsyncClient, profiler: Profiler | None = None, blockhash_cache: BlockhashCache | None = None):
         self.client = client
+        self.profiler = profiler or Profiler()
+        self.blockhash_cache = blockhash_cache or BlockhashCache()
         print("🧹 Sweeper initialized.")
 
-    def create_close_instructions(self, zombies: list[Pubkey], owner_pubkey: Pubkey) -> list[Instruction]:
+    def create_close_instructions(self, zombies: list, owner_pubkey: Pubkey) -> list[Instruction]:
+        """Takes Pubkeys (Token program accounts) or (Pubkey, token program) pairs from the sniffer."""
         print(f"🔨 Creating close instructions for {len(zombies)} zombie accounts.")
         instructions = []
-        for zombie_pubkey in zombies:
+        for zombie in zombies:
+            zombie_pubkey, program_id = zombie if isinstance(zombie, tuple) else (zombie, TOKEN_PROGRAM_ID)
             instructions.append(
                 close_account(
                     CloseAccountParams(
                         account=zombie_pubkey,
                         dest=owner_pubkey, 
                         owner=owner_pubkey,
-                        program_id=TOKEN_PROGRAM_ID
+                        program_id=program_id
                     )
                 )
             )
         return instructions
 
-    async def build_transactions(self, ixs: list[Instruction], owner_keypair: Keypair) -> list[str]:
-        print(f"🛠️ Building transactions for {len(ixs)} instructions.")
-        unsigned_transactions_base64 = []
-        
-        if ixs:
-            # Fetch a recent blockhash
-            latest_blockhash_resp = await self.client.get_latest_blockhash()
-            recent_blockhash = latest_blockhash_resp.value.blockhash
-
-            # Create a message with all instructions and the recent blockhash
-            message = Message.new_with_blockhash(ixs, owner_keypair.pubkey(), recent_blockhash)
-            
-            # Create an unsigned transaction by passing the message directly
-            transaction = Transaction.new_unsigned(message)
-            
-            # Encode to base64. Note: This transaction is NOT signed yet.
-            # The `execute_recycle` function will sign it later.
-            unsigned_transactions_base64.append(base64.b64encode(bytes(transaction)).decode('utf-8'))
-
-        return unsigned_transactions_base64
+    async def sign_transaction(self, ixs: list[Instruction], signer_keypair: Keypair) -> Transaction:
+        """Packs one batch of instructions (at most CLOSES_PER_TRANSACTION) with a recent blockhash and signs it."""
+        with self.profiler.stage("sweep.blockhash"):
+            recent_blockhash = await self.blockhash_cache.get(self.client)
+        message = Message.new_with_blockhash(ixs, signer_keypair.pubkey(), recent_blockhash)
+        return Transaction([signer_keypair], message, recent_blockhash)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+import daemon as daemon_module
+from daemon import AgentDaemon
+
+async def _ask(socket_path: str, line: bytes) -> dict:
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(line)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    return json.loads(response)
+
+async def test_bad_requests_get_an_answer():
+    daemon = AgentDaemon("http://127.0.0.1:1", socket_path="")
+    daemon.keypair = None
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "d.sock")
+        server = await asyncio.start_unix_server(daemon._handle, path=socket_path)
+        async with server:
+            for line in (b'{"command": "scan", "wallet": 123}\n', b'{"command": "scan", "wallet": "nope"}\n',
+                         b'["scan"]\n', b'not json\n'):
+                response = await _ask(socket_path, line)
+                assert not response["ok"] and response["error"].startswith("Bad request"), line
+            response = await _ask(socket_path, b'{"command": "scan"}\n')
+            assert response == {"ok": False, "error": "No wallet given and no keypair loaded"}
+            assert daemon.jobs_run == 0
+
+async def test_background_messages_stay_out_of_job_output(monkeypatch):
+    daemon = AgentDaemon("http://127.0.0.1:1", socket_path="")
+    daemon.keypair = daemon.sniffer = daemon.sweeper = None
+    daemon.client = SimpleNamespace(get_latest_blockhash=AsyncMock(side_effect=ConnectionError("RPC down")))
+    job_started, job_release = asyncio.Event(), asyncio.Event()
+
+    async def fake_run_cycle(*args, **kwargs):
+        print("job line")
+        job_started.set()
+        await job_release.wait()
+        return {"zombie": [], "transactions": 0, "signatures": []}
+    monkeypatch.setattr(daemon_module, "run_cycle", fake_run_cycle)
+
+    async def keep_warm_tick(): # What _keep_warm does, while the job has stdout redirected
+        await job_started.wait()
+        await daemon._refresh_blockhash()
+        job_release.set()
+
+    response, _ = await asyncio.gather(
+        daemon.dispatch({"command": "scan", "wallet": "11111111111111111111111111111111"}), keep_warm_tick())
+
+    assert response["ok"] and "job line" in response["output"]
+    assert "Could not refresh blockhash" not in response["output"]
@@ -0,0 +1,30 @@
+import asyncio
+from profiler import Profiler
+
+async def test_concurrent_stages_keep_their_peaks_and_count_wall_time_once():
+    profiler = Profiler(enabled=True)
+    profiler.start()
+    allocated, sibling_done = asyncio.Event(), asyncio.Event()
+
+    async def big():
+        with profiler.stage("download"):
+            buffer = bytearray(8 * 2**20)
+            allocated.set()
+            await sibling_done.wait() # The sibling resets the tracemalloc peak meanwhile
+            del buffer
+
+    async def small():
+        await allocated.wait()
+        with profiler.stage("download"):
+            await asyncio.sleep(0.05)
+        sibling_done.set()
+
+    await asyncio.gather(big(), small())
+    report = profiler.report()
+    profiler.write_report("/dev/null")
+
+    download = next(stage for stage in report["stages"] if stage["name"] == "download")
+    assert download["calls"] == 2 and download["max_concurrent"] == 2
+    assert download["alloc_peak_bytes"] >= 8 * 2**20
+    assert download["wall_s"] < 0.1 # Overlapping calls are not summed
+    assert report["stages_overlap"] and "note" in report
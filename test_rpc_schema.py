@@ -0,0 +1,43 @@
+import json
+import pytest
+from rpc_schema import RpcError, SchemaError, ValueStream
+
+ITEMS = [
+    {"pubkey": "A1", "account": {"data": {"parsed": {"info": {"tokenAmount": {"amount": "0"}}}}, "lamports": 2039280}},
+    {"pubkey": "B2", "account": {"note": "quote \" backslash \\ tab \t unicode é☃", "closed": True}},
+    {"pubkey": "C3", "account": {"lamports": 1234567890123, "extensions": [], "owner": None}},
+]
+BODY = json.dumps({"jsonrpc": "2.0", "result": {"context": {"slot": 7}, "value": ITEMS}, "id": 1},
+                  ensure_ascii=False).encode()
+
+def _stream(chunks) -> list:
+    stream = ValueStream("getTokenAccountsByOwner")
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    return items + stream.close()
+
+def test_every_two_chunk_split_decodes_the_same_items():
+    # Covers splits inside "value", keys, numbers, true/null, strings, escapes and multi-byte characters
+    for cut in range(1, len(BODY)):
+        assert _stream([BODY[:cut], BODY[cut:]]) == ITEMS, BODY[:cut][-20:]
+
+def test_byte_at_a_time_and_items_arrive_early():
+    assert _stream(BODY[i:i + 1] for i in range(len(BODY))) == ITEMS
+
+    stream = ValueStream("getTokenAccountsByOwner")
+    first_item_end = BODY.index(b'"lamports": 2039280}}') + len(b'"lamports": 2039280}}')
+    assert stream.feed(BODY[:first_item_end]) == ITEMS[:1] # Before the rest has arrived
+
+def test_truncated_value_array_raises():
+    end = BODY.rindex(b"]")
+    # Mid-item, mid-escape, inside the last item's closing braces, and every item whole but no "]"
+    for cut in (BODY.index(b'"B2"'), BODY.index(b"\\\\") + 1, end - 1, end):
+        with pytest.raises(SchemaError, match="truncated"):
+            _stream([BODY[:cut]])
+
+def test_replies_without_a_value_array():
+    with pytest.raises(RpcError, match="-32005"):
+        _stream([b'{"jsonrpc": "2.0", "error": {"code": -32005, ', b'"message": "rate limited"}, "id": 1}'])
+    with pytest.raises(SchemaError):
+        _stream([b'{"jsonrpc": "2.0", "result": {"context": {}}', b', "id": 1}'])
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+import solzzt
+from solzzt import MAX_UNCONFIRMED, PIPELINE_QUEUE_SIZE
+from sweeper import CLOSES_PER_TRANSACTION
+
+class FakeBatchSniffer:
+    """Stands in for Sniffer in batch mode: every wallet has two zombies worth 2039280 lamports each."""
+    in_flight = peak = 0
+
+    def __init__(self, client, rpc_url, profiler=None, http_client=None, verbose=True):
+        pass
+
+    async def sniff_accounts(self, owner_pubkey: Pubkey, on_zombies=None) -> dict:
+        FakeBatchSniffer.in_flight += 1
+        FakeBatchSniffer.peak = max(FakeBatchSniffer.peak, FakeBatchSniffer.in_flight)
+        await asyncio.sleep(0.01)
+        FakeBatchSniffer.in_flight -= 1
+        return {"zombie": [Pubkey.new_unique(), Pubkey.new_unique()], "blocked": [], "active_count": 1,
+                "recoverable_lamports": 2 * 2039280}
+
+async def test_batch_writes_one_line_per_wallet(tmp_path, monkeypatch):
+    monkeypatch.setattr(solzzt, "Sniffer", FakeBatchSniffer)
+    wallets = [str(Pubkey.new_unique()) for _ in range(10)]
+    wallets_file = tmp_path / "wallets.txt"
+    wallets_file.write_text("# header\n\n" + "\n".join(f"{w}  # note" for w in wallets) + "\nnot-a-wallet\n")
+    output = tmp_path / "out.jsonl"
+
+    totals = await solzzt.run_batch(str(wallets_file), "http://rpc.invalid", str(output), concurrency=3)
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(record["wallet"] for record in records) == sorted(wallets + ["not-a-wallet"])
+    assert FakeBatchSniffer.peak == 3
+    assert totals == {"wallets": 11, "failed": 1, "zombies": 20, "recoverable_lamports": 20 * 2039280}
+    failed = next(record for record in records if record["wallet"] == "not-a-wallet")
+    assert failed["error"].startswith("Invalid wallet address") and failed["zombies"] == []
+
+class FakeSniffer:
+    """Hands the zombies to the pipeline in fixed-size batches, as the streamed scan does."""
+    def __init__(self, zombies: int, batch_size: int):
+        self.zombies = [Pubkey.new_unique() for _ in range(zombies)]
+        self.batch_size = batch_size
+        self.batches_handed = 0
+
+    async def sniff_accounts(self, owner_pubkey: Pubkey, on_zombies=None) -> dict:
+        for i in range(0, len(self.zombies), self.batch_size):
+            await on_zombies([(zombie, None) for zombie in self.zombies[i:i + self.batch_size]])
+            self.batches_handed += 1
+        return {"zombie": self.zombies, "blocked": [], "active_count": 0, "recoverable_lamports": 0}
+
+class FakeSweeper:
+    """One "instruction" per zombie; a signed transaction is the batch's zombie keys."""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def create_close_instructions(self, zombies: list, owner_pubkey: Pubkey) -> list:
+        self.batch_sizes.append(len(zombies))
+        return [bytes(zombie) for zombie, _ in zombies]
+
+    async def sign_transaction(self, ixs: list, signer_keypair) -> bytes:
+        return b"".join(ixs)
+
+class FakeClient:
+    def __init__(self, fail_send: set = frozenset(), fail_confirm: set = frozenset()):
+        self.fail_send = fail_send # 1-based transaction numbers
+        self.fail_confirm = fail_confirm
+        self.sent = []
+        self.confirm_gate = asyncio.Event()
+        self.confirm_gate.set()
+
+    async def send_raw_transaction(self, raw_tx: bytes):
+        if len(self.sent) + 1 in self.fail_send:
+            self.fail_send = self.fail_send - {len(self.sent) + 1}
+            raise ConnectionError("send refused")
+        self.sent.append(raw_tx)
+        return SimpleNamespace(value=f"sig{len(self.sent)}")
+
+    async def confirm_transaction(self, signature: str):
+        await self.confirm_gate.wait()
+        if signature in self.fail_confirm:
+            raise TimeoutError("not confirmed")
+
+async def test_pipeline_batches_uneven_zombie_counts():
+    for count, expected in ((12, [12]), (13, [12, 1]), (30, [12, 12, 6])):
+        sniffer, sweeper, client = FakeSniffer(count, batch_size=5), FakeSweeper(), FakeClient()
+        results = await solzzt.run_sweep_pipeline(client, sniffer, sweeper, Keypair())
+
+        assert sweeper.batch_sizes == expected
+        assert results["transactions"] == len(expected) and len(results["signatures"]) == len(expected)
+        assert b"".join(client.sent) == b"".join(bytes(zombie) for zombie in sniffer.zombies) # All, once, in order
+
+async def test_pipeline_skips_failed_send_and_failed_confirm():
+    sniffer = FakeSniffer(CLOSES_PER_TRANSACTION * 4, batch_size=CLOSES_PER_TRANSACTION)
+    client = FakeClient(fail_send={2}, fail_confirm={"sig1"})
+    results = await solzzt.run_sweep_pipeline(client, sniffer, FakeSweeper(), Keypair())
+
+    assert results["transactions"] == 3 # Transaction 2 was never sent
+    assert sorted(results["signatures"]) == ["sig2", "sig3"] # sig1 was sent but not confirmed
+    assert results["zombie"] == sniffer.zombies
+
+async def test_pipeline_applies_backpressure():
+    # One transaction per batch; confirmations are held, so sending stalls and the queues fill up
+    sniffer = FakeSniffer(CLOSES_PER_TRANSACTION * 40, batch_size=CLOSES_PER_TRANSACTION)
+    client = FakeClient()
+    client.confirm_gate.clear()
+    pipeline = asyncio.create_task(solzzt.run_sweep_pipeline(client, sniffer, FakeSweeper(), Keypair()))
+    await asyncio.sleep(0.05)
+
+    assert len(client.sent) == MAX_UNCONFIRMED
+    # Each stage holds at most one batch besides its full output queue
+    assert sniffer.batches_handed <= MAX_UNCONFIRMED + 3 * (PIPELINE_QUEUE_SIZE + 1) + 1
+    assert not pipeline.done()
+
+    client.confirm_gate.set()
+    results = await asyncio.wait_for(pipeline, timeout=5)
+    assert results["transactions"] == 40 and len(results["signatures"]) == 40
+
+class FlakySignSweeper(FakeSweeper):
+    """Every other batch hits a rate limit while fetching its blockhash."""
+    signed = 0
+
+    async def sign_transaction(self, ixs: list, signer_keypair) -> bytes:
+        await asyncio.sleep(0)
+        self.signed += 1
+        if self.signed % 2 == 0:
+            raise ConnectionError("429 Too Many Requests on getLatestBlockhash")
+        return b"".join(ixs)
+
+class FailingPackSweeper(FakeSweeper):
+    def create_close_instructions(self, zombies: list, owner_pubkey: Pubkey) -> list:
+        if len(self.batch_sizes) == 2: # Once the sniffer has filled the queue behind it
+            raise ValueError("unknown token program")
+        return super().create_close_instructions(zombies, owner_pubkey)
+
+async def test_pipeline_skips_a_batch_that_fails_to_sign():
+    sniffer = FakeSniffer(CLOSES_PER_TRANSACTION * 4, batch_size=CLOSES_PER_TRANSACTION)
+    client = FakeClient()
+    results = await solzzt.run_sweep_pipeline(client, sniffer, FlakySignSweeper(), Keypair())
+
+    assert results["transactions"] == 2 and len(results["signatures"]) == 2
+    assert client.sent == [b"".join(bytes(z) for z in sniffer.zombies[i:i + CLOSES_PER_TRANSACTION])
+                           for i in (0, 2 * CLOSES_PER_TRANSACTION)]
+
+async def test_pipeline_raises_when_a_stage_fails():
+    sniffer = FakeSniffer(CLOSES_PER_TRANSACTION * 40, batch_size=CLOSES_PER_TRANSACTION)
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(solzzt.run_sweep_pipeline(FakeClient(), sniffer, FailingPackSweeper(), Keypair()), timeout=5)